@@ -0,0 +1,351 @@
+"""
+Admission control for expensive endpoints.
+
+Each endpoint class (TTS, STT, seeding) has a concurrency limit, a bounded
+queue of requests waiting for a slot and a maximum wait. A request that finds
+the queue full or waits too long is shed with 503 and ``Retry-After``. On top
+of that every client has a token bucket per class; a request without a token
+gets 429 with ``Retry-After`` set to when the next token arrives.
+
+Waiting happens on the event loop before the endpoint is dispatched, so
+queued heavy requests hold no threadpool thread and cheap endpoints keep
+being served.
+
+Two stores keep the counters:
+
+- ``MemoryStore``: this process only.
+- ``SharedStore``: a memory-mapped file locked with ``flock`` (like the
+  response cache's version counters), shared by every worker on the host.
+  Slots and queue places are recorded per process, so those held by a worker
+  that died are reclaimed. Token buckets live in a fixed-size hash table; a
+  bucket that has refilled completely carries no information, so when a probe
+  sequence is full the stalest bucket is reused.
+"""
+
+from __future__ import annotations
+import os
+import mmap
+import time
+import fcntl
+import struct
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+class Limits:
+    """Limits for one endpoint class. ``rate`` is tokens per second; 0 disables the rate limit."""
+
+    def __init__(self, concurrency: int, queue: int = 0, max_wait: float = 0.0,
+                 rate: float = 0.0, burst: int = 1, retry_after: int = 1):
+        self.concurrency = max(1, concurrency)
+        self.queue = max(0, queue)
+        self.max_wait = max(0.0, max_wait)
+        self.rate = max(0.0, rate)
+        self.burst = max(1, burst)
+        self.retry_after = max(1, retry_after)
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> float:
+    return min(float(burst), tokens + (now - updated) * rate)
+
+
+class MemoryStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_use: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def try_acquire(self, cls: str, limit: int) -> bool:
+        with self._lock:
+            if self._in_use.get(cls, 0) >= limit:
+                return False
+            self._in_use[cls] = self._in_use.get(cls, 0) + 1
+            return True
+
+    def release(self, cls: str):
+        with self._lock:
+            self._in_use[cls] = max(0, self._in_use.get(cls, 0) - 1)
+
+    def enqueue(self, cls: str, limit: int) -> bool:
+        with self._lock:
+            if self._waiting.get(cls, 0) >= limit:
+                return False
+            self._waiting[cls] = self._waiting.get(cls, 0) + 1
+            return True
+
+    def dequeue(self, cls: str):
+        with self._lock:
+            self._waiting[cls] = max(0, self._waiting.get(cls, 0) - 1)
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        """0 if a token was taken, else seconds until one is available."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 100_000:
+                # Drop buckets that have refilled completely; they are equivalent to new ones.
+                full = [k for k, (t, u) in self._buckets.items() if _refill(t, u, now, rate, burst) >= burst]
+                for k in full:
+                    del self._buckets[k]
+        return (1 - tokens) / rate
+
+    def counts(self, classes) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {cls: {"in_use": self._in_use.get(cls, 0), "waiting": self._waiting.get(cls, 0)}
+                    for cls in classes}
+
+
+_HEADER = struct.Struct("<Q")  # magic
+_CLASS = struct.Struct("<Qii")  # name hash, in use, waiting
+_HOLDER = struct.Struct("<iiii")  # pid, class index, held, waiting
+_BUCKET = struct.Struct("<Qdd")  # key hash, tokens, updated
+_MAGIC = 0x41444D4954000001
+_PROBES = 8
+
+
+def _hash(text: str) -> int:
+    # Never 0, which marks an empty slot.
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class SharedStore:
+    def __init__(self, path: str, classes: int = 16, holders: int = 256, buckets: int = 16384):
+        self.path = path
+        self.classes = classes
+        self.holders = holders
+        self.buckets = buckets
+        self._class_off = _HEADER.size
+        self._holder_off = self._class_off + classes * _CLASS.size
+        self._bucket_off = self._holder_off + holders * _HOLDER.size
+        size = self._bucket_off + buckets * _BUCKET.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size != size or _HEADER.unpack(os.pread(fd, _HEADER.size, 0))[0] != _MAGIC:
+                # New file, or one laid out differently by another version: start over.
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC), 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock_fd = os.open(path, os.O_RDWR)
+        self._lock = threading.Lock()
+        self._class_index: Dict[str, int] = {}
+        os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    # -- locking and table helpers (call with the lock held) --
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _after_fork_in_child(self):
+        # flock belongs to the open file description, which a forked child shares
+        # with its parent; the child needs its own to actually exclude the parent.
+        os.close(self._lock_fd)
+        self._lock_fd = os.open(self.path, os.O_RDWR)
+        self._lock = threading.Lock()
+
+    def _class(self, cls: str) -> int:
+        index = self._class_index.get(cls)
+        if index is not None:
+            return index
+        h = _hash(cls)
+        for i in range(self.classes):
+            off = self._class_off + i * _CLASS.size
+            name, _, _ = _CLASS.unpack_from(self._map, off)
+            if name == h:
+                break
+            if name == 0:
+                _CLASS.pack_into(self._map, off, h, 0, 0)
+                break
+        else:
+            raise RuntimeError("admission store has no free class slots")
+        self._class_index[cls] = i
+        return i
+
+    def _adjust(self, cls: str, held: int = 0, waiting: int = 0):
+        """Add to the class totals and to this process's holder entry."""
+        index = self._class(cls)
+        off = self._class_off + index * _CLASS.size
+        name, in_use, queued = _CLASS.unpack_from(self._map, off)
+        _CLASS.pack_into(self._map, off, name, max(0, in_use + held), max(0, queued + waiting))
+        pid = os.getpid()
+        free = None
+        for i in range(self.holders):
+            hoff = self._holder_off + i * _HOLDER.size
+            hpid, hcls, hheld, hwait = _HOLDER.unpack_from(self._map, hoff)
+            if hpid == pid and hcls == index:
+                hheld, hwait = max(0, hheld + held), max(0, hwait + waiting)
+                _HOLDER.pack_into(self._map, hoff, 0 if not (hheld or hwait) else pid, hcls, hheld, hwait)
+                return
+            if hpid == 0 and free is None:
+                free = hoff
+        if free is not None and (held > 0 or waiting > 0):
+            _HOLDER.pack_into(self._map, free, pid, index, max(0, held), max(0, waiting))
+
+    def _reclaim(self):
+        """Give back slots and queue places held by processes that no longer exist."""
+        for i in range(self.holders):
+            hoff = self._holder_off + i * _HOLDER.size
+            hpid, hcls, hheld, hwait = _HOLDER.unpack_from(self._map, hoff)
+            if hpid == 0 or _alive(hpid):
+                continue
+            off = self._class_off + hcls * _CLASS.size
+            name, in_use, queued = _CLASS.unpack_from(self._map, off)
+            _CLASS.pack_into(self._map, off, name, max(0, in_use - hheld), max(0, queued - hwait))
+            _HOLDER.pack_into(self._map, hoff, 0, 0, 0, 0)
+
+    def _totals(self, cls: str) -> Tuple[int, int]:
+        _, in_use, queued = _CLASS.unpack_from(self._map, self._class_off + self._class(cls) * _CLASS.size)
+        return in_use, queued
+
+    # -- store interface --
+
+    def try_acquire(self, cls: str, limit: int) -> bool:
+        with self._locked():
+            in_use, _ = self._totals(cls)
+            if in_use >= limit:
+                self._reclaim()
+                in_use, _ = self._totals(cls)
+                if in_use >= limit:
+                    return False
+            self._adjust(cls, held=1)
+            return True
+
+    def release(self, cls: str):
+        with self._locked():
+            self._adjust(cls, held=-1)
+
+    def enqueue(self, cls: str, limit: int) -> bool:
+        with self._locked():
+            _, queued = self._totals(cls)
+            if queued >= limit:
+                self._reclaim()
+                _, queued = self._totals(cls)
+                if queued >= limit:
+                    return False
+            self._adjust(cls, waiting=1)
+            return True
+
+    def dequeue(self, cls: str):
+        with self._locked():
+            self._adjust(cls, waiting=-1)
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        h = _hash(key)
+        start = h % self.buckets
+        now = time.time()
+        with self._locked():
+            target, stalest, stalest_at = None, None, None
+            for probe in range(_PROBES):
+                off = self._bucket_off + ((start + probe) % self.buckets) * _BUCKET.size
+                bh, tokens, updated = _BUCKET.unpack_from(self._map, off)
+                if bh == h:
+                    target = off
+                    break
+                if bh == 0:
+                    target, tokens, updated = off, float(burst), now
+                    break
+                if stalest_at is None or updated < stalest_at:
+                    stalest, stalest_at = off, updated
+            else:
+                target, tokens, updated = stalest, float(burst), now
+            tokens = _refill(tokens, updated, now, rate, burst)
+            taken = tokens >= 1
+            _BUCKET.pack_into(self._map, target, h, tokens - 1 if taken else tokens, now)
+        return 0.0 if taken else (1 - tokens) / rate
+
+    def counts(self, classes) -> Dict[str, Dict[str, int]]:
+        with self._locked():
+            self._reclaim()
+            return {cls: dict(zip(("in_use", "waiting"), self._totals(cls))) for cls in classes}
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AdmissionController:
+    def __init__(self, store, classes: Dict[str, Limits], poll_seconds: float = 0.01):
+        self.store = store
+        self.classes = classes
+        self.poll_seconds = poll_seconds
+        self.admitted: Dict[str, int] = {cls: 0 for cls in classes}
+        self.shed: Dict[str, int] = {cls: 0 for cls in classes}
+        self.rate_limited: Dict[str, int] = {cls: 0 for cls in classes}
+
+    async def acquire(self, cls: str, client: str):
+        """Wait for a slot in ``cls``; raises Rejected when rate limited or shed."""
+        limits = self.classes[cls]
+        if limits.rate:
+            wait = self.store.take_token(f"{cls}:{client}", limits.rate, limits.burst)
+            if wait:
+                self.rate_limited[cls] += 1
+                raise Rejected(429, f"Rate limit exceeded for {cls} requests.", wait)
+        if self.store.try_acquire(cls, limits.concurrency):
+            self.admitted[cls] += 1
+            return
+        if not limits.queue or not self.store.enqueue(cls, limits.queue):
+            self.shed[cls] += 1
+            raise Rejected(503, f"Too many {cls} requests in progress.", limits.retry_after)
+        try:
+            deadline = time.monotonic() + limits.max_wait
+            delay = self.poll_seconds
+            while True:
+                await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                if self.store.try_acquire(cls, limits.concurrency):
+                    self.admitted[cls] += 1
+                    return
+                if time.monotonic() >= deadline:
+                    self.shed[cls] += 1
+                    raise Rejected(503, f"Too many {cls} requests in progress.", limits.retry_after)
+                delay = min(delay * 2, 0.1)
+        finally:
+            self.store.dequeue(cls)
+
+    def release(self, cls: str):
+        self.store.release(cls)
+
+    def stats(self) -> Dict:
+        counts = self.store.counts(self.classes)
+        return {
+            "store": type(self.store).__name__,
+            "classes": {cls: {**limits.as_dict(), **counts[cls],
+                              "admitted": self.admitted[cls], "shed": self.shed[cls],
+                              "rate_limited": self.rate_limited[cls]}
+                        for cls, limits in self.classes.items()},
+        }
@@ -13,58 +13,68 @@ import os
 import io
 import json
 import math
-import tempfile
+import asyncio
 import datetime
 import logging
 import smtplib
+import hashlib
+import gc
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import OrderedDict
 from typing import Optional, Dict, Tuple, List
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-from fastapi import FastAPI, HTTPException, Body, Query, File, UploadFile, Request
-from fastapi.responses import JSONResponse, StreamingResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Body, Query, File, UploadFile, Request, Depends
+from fastapi.responses import JSONResponse, StreamingResponse, HTMLResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from pydantic import BaseModel, Field
 import os
 
 # SQLAlchemy for both databases
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, Float, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship
-
-# Optional heavy deps for AI Tutor
-try:
-    from transformers import MarianMTModel, MarianTokenizer
-    _HAS_MARIAN = True
-except Exception:
-    _HAS_MARIAN = False
-
-try:
-    from gtts import gTTS
-    _HAS_GTTS = True
-except Exception:
-    _HAS_GTTS = False
-
-try:
-    import speech_recognition as sr
-    _HAS_SR = True
-except Exception:
-    _HAS_SR = False
-
-# Rapid fuzzy matching
-try:
-    from rapidfuzz import fuzz
-except Exception:
-    def _ratio(a, b): return 100 if a == b else 0
-    class _Faux:
-        token_sort_ratio = staticmethod(_ratio)
-    fuzz = _Faux()
+from sqlalchemy import select, inspect, func, case, insert, update, text as sql_text, Index, Column, Integer, String, Text, DateTime, Date, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import declarative_base, relationship
+
+import db
+
+from tts_cache import TTSEngine, StubTTSEngine, AudioCache, parse_range
+from due_queue import DueQueue
+import card_import
+from response_cache import ResponseCache, VersionCounters
+from static_assets import StaticSite
+from translation_server import TranslationServer, TranslationClient
+import metrics
+from profiler import ProfilerControl
+import admission
+import grading
+import lazy_imports
+from lazy_imports import available, lazy
+
+# Optional heavy deps for AI Tutor. The flags only check that the packages are
+# installed; the modules are imported on first use (see lazy_imports).
+torch = lazy("torch")
+transformers = lazy("transformers")
+gtts = lazy("gtts")
+sr = lazy("speech_recognition")
+np = lazy("numpy")
+_HAS_MARIAN = available("torch") and available("transformers")
+_HAS_GTTS = available("gtts")
+_HAS_SR = available("speech_recognition")
+_HAS_NUMPY = available("numpy")
 
 # ------------------------
 # Contact Database (Flask part)
 # ------------------------
-contact_engine = create_engine('sqlite:////home/kj/portfolio/portfolio/backend/contact_messages.db', connect_args={"check_same_thread": False} if 'sqlite' in 'sqlite:////home/kj/portfolio/portfolio/backend/contact_messages.db' else {})
-ContactSessionLocal = sessionmaker(bind=contact_engine, autoflush=False, autocommit=False)
+contact_engine = db.make_engine(db.CONTACT_DATABASE_URL)
+ContactSessionLocal = db.make_sessionmaker(contact_engine)
+contact_async_db = db.AsyncDatabase(db.CONTACT_DATABASE_URL)
 ContactBase = declarative_base()
 
 class ContactMessage(ContactBase):
@@ -74,14 +84,36 @@ class ContactMessage(ContactBase):
     email = Column(String(120), nullable=False)
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    status = Column(String(16), default="pending", index=True)  # pending|sending|sent|failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_error = Column(Text, default="")
+    sent_at = Column(DateTime, nullable=True)
+
+def ensure_columns(engine, table: str, columns: Dict[str, str]):
+    """Add columns missing from an existing SQLite table (create_all only creates tables)."""
+    existing = {c["name"] for c in inspect(engine).get_columns(table)}
+    with engine.begin() as conn:
+        for name, ddl in columns.items():
+            if name not in existing:
+                conn.execute(sql_text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
 
 ContactBase.metadata.create_all(contact_engine)
+# Messages stored before the outbox existed were emailed inline, so they count as sent.
+ensure_columns(contact_engine, "contact_messages", {
+    "status": "VARCHAR(16) DEFAULT 'sent'",
+    "attempts": "INTEGER DEFAULT 0",
+    "next_attempt_at": "DATETIME",
+    "last_error": "TEXT DEFAULT ''",
+    "sent_at": "DATETIME",
+})
 
 # ------------------------
 # AI Tutor Database
 # ------------------------
-tutor_engine = create_engine('sqlite:////home/kj/portfolio/portfolio/backend/teach_me_ai.db', connect_args={"check_same_thread": False} if 'sqlite' in 'sqlite:////home/kj/portfolio/portfolio/backend/teach_me_ai.db' else {})
-TutorSessionLocal = sessionmaker(bind=tutor_engine, autoflush=False, autocommit=False)
+tutor_engine = db.make_engine(db.TUTOR_DATABASE_URL)
+TutorSessionLocal = db.make_sessionmaker(tutor_engine)
+tutor_async_db = db.AsyncDatabase(db.TUTOR_DATABASE_URL)
 TutorBase = declarative_base()
 
 class Course(TutorBase):
@@ -95,6 +127,7 @@ class Course(TutorBase):
 
 class Card(TutorBase):
     __tablename__ = "cards"
+    __table_args__ = (Index("ix_cards_course_next_review", "course_id", "next_review"),)
     id = Column(Integer, primary_key=True)
     course_id = Column(Integer, ForeignKey("courses.id"), index=True)
     front = Column(Text)
@@ -107,7 +140,42 @@ class Card(TutorBase):
     next_review = Column(Date, default=datetime.date.today)
     course = relationship("Course", back_populates="cards")
 
+class TranslationMemory(TutorBase):
+    __tablename__ = "translation_memory"
+    __table_args__ = (UniqueConstraint("src", "tgt", "text", name="uq_translation_memory"),)
+    id = Column(Integer, primary_key=True)
+    src = Column(String, nullable=False)
+    tgt = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    translation = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class SeedJob(TutorBase):
+    __tablename__ = "seed_jobs"
+    id = Column(Integer, primary_key=True)
+    status = Column(String, default="pending", index=True)  # pending|running|cancelling|cancelled|done|failed
+    level = Column(String, default="A1")
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, default="")
+    languages = relationship("SeedJobLanguage", back_populates="job")
+
+class SeedJobLanguage(TutorBase):
+    __tablename__ = "seed_job_languages"
+    __table_args__ = (UniqueConstraint("job_id", "iso", name="uq_seed_job_language"),)
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("seed_jobs.id"), index=True)
+    iso = Column(String, nullable=False)
+    status = Column(String, default="pending")  # pending|running|done|failed|cancelled
+    message = Column(Text, default="")
+    finished_at = Column(DateTime, nullable=True)
+    job = relationship("SeedJob", back_populates="languages")
+
 TutorBase.metadata.create_all(tutor_engine)
+# create_all skips indexes on tables that already exist
+for _index in Card.__table__.indexes:
+    _index.create(tutor_engine, checkfirst=True)
 
 # ------------------------
 # App
@@ -122,8 +190,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so its latency covers the whole stack (see the Metrics section).
+app.add_middleware(metrics.MetricsMiddleware)
 
-# Note: Static files are served by React development server
+# In development the React dev server serves the UI; in production the build
+# copied into backend/static is served by the catch-all route at the end of this file.
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -160,64 +231,255 @@ LANGUAGES: Dict[str, str] = {
 # ------------------------
 # MarianMT cache
 # ------------------------
-_MARIAN_CACHE: Dict[Tuple[str,str], Dict] = {}
+MARIAN_BATCH_SIZE = int(os.environ.get("MARIAN_BATCH_SIZE", 16))
+MARIAN_CACHE_MB = int(os.environ.get("MARIAN_CACHE_MB", 2048))
+MARIAN_NEGATIVE_TTL = int(os.environ.get("MARIAN_NEGATIVE_TTL", 3600))
+# Comma separated "src-tgt" pairs loaded at startup, e.g. "en-fr,en-es"
+MARIAN_WARMUP = [p.strip() for p in os.environ.get("MARIAN_WARMUP", "").split(",") if p.strip()]
+
+# CPU inference mode. Defaults keep the full-precision model and torch's own threading.
+MARIAN_INFERENCE = {
+    "quantize": os.environ.get("MARIAN_QUANTIZE", "0") == "1",
+    "threads": int(os.environ.get("MARIAN_THREADS", 0)),      # intra-op threads per worker, 0 = torch default
+    "num_beams": int(os.environ.get("MARIAN_NUM_BEAMS", 0)),  # 1 = greedy, 0 = model default
+}
+
+def configure_marian_inference(quantize: Optional[bool] = None, threads: Optional[int] = None,
+                               num_beams: Optional[int] = None):
+    """Update the inference mode; loaded models are dropped when quantisation changes."""
+    if quantize is not None and quantize != MARIAN_INFERENCE["quantize"]:
+        MARIAN_INFERENCE["quantize"] = quantize
+        _MARIAN_CACHE.clear()
+    if threads is not None:
+        MARIAN_INFERENCE["threads"] = threads
+    if num_beams is not None:
+        MARIAN_INFERENCE["num_beams"] = num_beams
+    # Don't import torch just to configure it; loading the first model applies this.
+    if lazy_imports.is_loaded(torch):
+        _apply_torch_threads()
+
+def _apply_torch_threads():
+    if MARIAN_INFERENCE["threads"] > 0:
+        torch.set_num_threads(MARIAN_INFERENCE["threads"])
+
+def _prepare_marian_model(mdl):
+    mdl.eval()
+    if MARIAN_INFERENCE["quantize"]:
+        mdl = torch.quantization.quantize_dynamic(mdl, {torch.nn.Linear}, dtype=torch.qint8)
+    return mdl
+
+def _marian_generate(pack: Dict, texts: List[str]) -> List[str]:
+    tok = pack["tok"]; mdl = pack["mdl"]
+    kwargs = {"max_length": 128}
+    if MARIAN_INFERENCE["num_beams"] > 0:
+        kwargs["num_beams"] = MARIAN_INFERENCE["num_beams"]
+    with metrics.timed("marian_generate", pack.get("pair", "")), torch.inference_mode():
+        inputs = tok(texts, return_tensors="pt", truncation=True, padding=True)
+        outs = mdl.generate(**inputs, **kwargs)
+    return tok.batch_decode(outs, skip_special_tokens=True)
+
+def _model_nbytes(mdl) -> int:
+    # state_dict() rather than parameters()/buffers(): dynamically quantized
+    # Linear layers keep their int8 weights in packed params that neither returns.
+    seen = set()
+
+    def nbytes(value) -> int:
+        if isinstance(value, (tuple, list)):
+            return sum(nbytes(v) for v in value)
+        if not hasattr(value, "element_size"):
+            return 0  # e.g. the dtype saved next to packed params
+        key = (value.data_ptr(), value.numel(), value.dtype)
+        if key in seen:
+            return 0  # tied weights, such as the shared embeddings
+        seen.add(key)
+        return value.numel() * value.element_size()
+
+    try:
+        return sum(nbytes(v) for v in mdl.state_dict().values())
+    except Exception:
+        return 0
+
+class MarianModelCache:
+    """LRU cache of loaded Marian models, bounded by an approximate memory budget.
+
+    Pairs whose model could not be loaded are remembered for ``negative_ttl``
+    seconds so unsupported languages do not hit ``from_pretrained`` every call.
+    """
+
+    def __init__(self, budget_bytes: int, negative_ttl: int):
+        self.budget_bytes = budget_bytes
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Tuple[str,str], Dict]" = OrderedDict()
+        self._missing: Dict[Tuple[str,str], float] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str,str], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.load_failures = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def used_bytes(self) -> int:
+        return sum(e["nbytes"] for e in self._entries.values())
+
+    def get(self, key: Tuple[str,str]) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            failed_at = self._missing.get(key)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < self.negative_ttl:
+                    self.negative_hits += 1
+                    return None
+                del self._missing[key]
+            self.misses += 1
+            return None
+
+    def is_missing(self, key: Tuple[str,str]) -> bool:
+        with self._lock:
+            failed_at = self._missing.get(key)
+            return failed_at is not None and time.monotonic() - failed_at < self.negative_ttl
+
+    def load_lock(self, key: Tuple[str,str]) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def put(self, key: Tuple[str,str], pack: Dict):
+        pack["nbytes"] = _model_nbytes(pack["mdl"])
+        with self._lock:
+            self._entries[key] = pack
+            self._entries.move_to_end(key)
+            # Always keep the newest model, even if it alone exceeds the budget.
+            while len(self._entries) > 1 and self.used_bytes() > self.budget_bytes:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def mark_missing(self, key: Tuple[str,str]):
+        with self._lock:
+            self._missing[key] = time.monotonic()
+            self.load_failures += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "models": [f"{s}-{t}" for s, t in self._entries],
+                "used_mb": round(self.used_bytes() / (1024 * 1024), 1),
+                "budget_mb": round(self.budget_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "evictions": self.evictions,
+                "load_failures": self.load_failures,
+                "unavailable": [f"{s}-{t}" for s, t in self._missing],
+            }
+
+_MARIAN_CACHE = MarianModelCache(MARIAN_CACHE_MB * 1024 * 1024, MARIAN_NEGATIVE_TTL)
 
 def load_marian_model(src: str, tgt: str) -> Optional[Dict]:
     key = (src, tgt)
-    if key in _MARIAN_CACHE:
-        return _MARIAN_CACHE[key]
+    pack = _MARIAN_CACHE.get(key)
+    if pack is not None or _MARIAN_CACHE.is_missing(key):
+        return pack
     if not _HAS_MARIAN:
         return None
-    model_name = f"Helsinki-NLP/opus-mt-{src}-{tgt}"
-    try:
-        tok = MarianTokenizer.from_pretrained(model_name)
-        mdl = MarianMTModel.from_pretrained(model_name)
-        _MARIAN_CACHE[key] = {"tok": tok, "mdl": mdl}
-        return _MARIAN_CACHE[key]
-    except Exception:
-        return None
+    with _MARIAN_CACHE.load_lock(key):
+        # Another thread may have finished loading while we waited.
+        if key in _MARIAN_CACHE:
+            return _MARIAN_CACHE.get(key)
+        if _MARIAN_CACHE.is_missing(key):
+            return None
+        model_name = f"Helsinki-NLP/opus-mt-{src}-{tgt}"
+        try:
+            if not lazy_imports.is_loaded(torch):
+                lazy_imports.load(torch)
+                _apply_torch_threads()
+            with metrics.timed("marian_load", f"{src}-{tgt}"):
+                tok = transformers.MarianTokenizer.from_pretrained(model_name)
+                mdl = _prepare_marian_model(transformers.MarianMTModel.from_pretrained(model_name))
+        except Exception:
+            _MARIAN_CACHE.mark_missing(key)
+            return None
+        pack = {"tok": tok, "mdl": mdl, "pair": f"{src}-{tgt}"}
+        _MARIAN_CACHE.put(key, pack)
+        return pack
+
+configure_marian_inference()
+
+def warm_marian_cache(pairs: List[str]) -> Dict[str, bool]:
+    loaded = {}
+    for pair in pairs:
+        src, _, tgt = pair.partition("-")
+        if not src or not tgt:
+            continue
+        loaded[pair] = load_marian_model(src, tgt) is not None
+    return loaded
 
 def translate_with_marian(text: str, src: str, tgt: str) -> Optional[str]:
     pack = load_marian_model(src, tgt)
     if not pack:
         return None
-    tok = pack["tok"]; mdl = pack["mdl"]
-    inputs = tok([text], return_tensors="pt", truncation=True, padding=True)
-    outs = mdl.generate(**inputs, max_length=128)
-    return tok.decode(outs[0], skip_special_tokens=True)
+    return _marian_generate(pack, [text])[0]
+
+def translate_batch_with_marian(texts: List[str], src: str, tgt: str, batch_size: Optional[int] = None) -> Optional[List[str]]:
+    """Translate a list of sentences with one padded generate() call per batch."""
+    pack = load_marian_model(src, tgt)
+    if not pack:
+        return None
+    batch_size = max(1, batch_size or MARIAN_BATCH_SIZE)
+    results: List[str] = []
+    for i in range(0, len(texts), batch_size):
+        results.extend(_marian_generate(pack, texts[i:i + batch_size]))
+    return results
+
+# ------------------------
+# Translation service
+# ------------------------
+# `python app.py translation-server` runs one process that owns the Marian
+# models and micro-batches requests from every worker. When its socket is
+# missing or unreachable, workers fall back to in-process inference.
+TRANSLATION_SOCKET = os.environ.get("TRANSLATION_SOCKET", os.path.join(tempfile.gettempdir(), "portfolio-translate.sock"))
+TRANSLATION_MAX_BATCH = int(os.environ.get("TRANSLATION_MAX_BATCH", 32))
+TRANSLATION_MAX_WAIT_MS = float(os.environ.get("TRANSLATION_MAX_WAIT_MS", 10))
+TRANSLATION_THREADS = int(os.environ.get("TRANSLATION_THREADS", 1))
+TRANSLATION_TIMEOUT = float(os.environ.get("TRANSLATION_TIMEOUT", 30))
+
+_TRANSLATION_CLIENT = TranslationClient(TRANSLATION_SOCKET, timeout=TRANSLATION_TIMEOUT)
+
+def run_translation_server():
+    if MARIAN_WARMUP:
+        logger.info(f"Marian warm-up: {warm_marian_cache(MARIAN_WARMUP)}")
+    server = TranslationServer(translate_batch_with_marian, max_batch=TRANSLATION_MAX_BATCH,
+                               max_wait_ms=TRANSLATION_MAX_WAIT_MS, threads=TRANSLATION_THREADS)
+    logger.info(f"Translation service listening on {TRANSLATION_SOCKET}")
+    asyncio.run(server.serve(TRANSLATION_SOCKET))
 
 # ------------------------
 # Utilities
 # ------------------------
-def normalize(s: str) -> str:
-    return s.strip().lower()
+normalize = grading.normalize
+
+# Threads rapidfuzz may use for one batch grade or deck match (-1 = all cores).
+GRADE_WORKERS = int(os.environ.get("GRADE_WORKERS", -1))
+GRADE_BATCH_MAX = int(os.environ.get("GRADE_BATCH_MAX", 10000))
 
 def grade_similarity(expected: str, answer: str) -> Dict:
-    e = normalize(expected)
-    a = normalize(answer)
-    try:
-        sim = fuzz.token_sort_ratio(e, a)
-    except Exception:
-        sim = 100 if e == a else 0
-    if sim >= 95:
-        grade = 5
-    elif sim >= 85:
-        grade = 4
-    elif sim >= 70:
-        grade = 3
-    elif sim >= 50:
-        grade = 2
-    elif sim >= 30:
-        grade = 1
-    else:
-        grade = 0
-    feedback = (
-        "Perfect!" if grade >= 4 else
-        "Good — minor issues." if grade == 3 else
-        "Needs work — try again." if grade >= 1 else
-        "Far off — study the pattern."
-    )
-    return {"similarity": int(sim), "grade": grade, "feedback": feedback}
+    return grading.grade_result(grading.token_sort_ratio(expected, answer))
+
+def grade_batch(expected: List[str], answers: List[str]) -> List[Dict]:
+    """grade_similarity for each (expected[i], answers[i]) pair, scored in bulk."""
+    return grading.grade_pairs(expected, answers, workers=GRADE_WORKERS)
 
 def sm2_update(card: Card, quality: int):
     if quality < 3:
@@ -236,6 +498,35 @@ def sm2_update(card: Card, quality: int):
         card.efactor = 1.3
     card.next_review = datetime.date.today() + datetime.timedelta(days=card.interval)
 
+def sm2_update_batch(repetition, interval, efactor, quality, today: Optional[datetime.date] = None):
+    """Vectorised sm2_update over parallel sequences.
+
+    Returns (repetition, interval, efactor, next_review) lists whose values match
+    applying sm2_update to each card in turn.
+    """
+    today = today or datetime.date.today()
+    if not _HAS_NUMPY:
+        out = ([], [], [], [])
+        for rep, ivl, ef, q in zip(repetition, interval, efactor, quality):
+            card = Card(repetition=rep, interval=ivl, efactor=ef)
+            sm2_update(card, q)
+            for column, value in zip(out, (card.repetition, card.interval, card.efactor, card.next_review)):
+                column.append(value)
+        return out
+    rep = np.asarray(repetition, dtype=np.int64)
+    ivl = np.asarray(interval, dtype=np.int64)
+    ef = np.asarray(efactor, dtype=np.float64)
+    q = np.asarray(quality, dtype=np.int64)
+    passed = q >= 3
+    new_rep = np.where(passed, rep + 1, 0)
+    # np.round rounds half to even, like the builtin round() used by sm2_update
+    grown = np.round(ivl * ef).astype(np.int64)
+    new_ivl = np.where(~passed | (new_rep == 1), 1, np.where(new_rep == 2, 6, grown))
+    d = 5 - q
+    new_ef = np.maximum(ef + (0.1 - d * (0.08 + d * 0.02)), 1.3)
+    next_review = (np.datetime64(today, "D") + new_ivl.astype("timedelta64[D]")).tolist()
+    return new_rep.tolist(), new_ivl.tolist(), new_ef.tolist(), next_review
+
 STARTER_PHRASES = [
     "Hello", "Good morning", "Good evening", "Goodbye", "Please",
     "Thank you", "You're welcome", "How are you?", "I'm fine", "What's your name?",
@@ -248,52 +539,301 @@ def translate_fallback(text: str, tgt_iso: str) -> str:
     return f"[{tgt_iso}] {text}"
 
 def translate(text: str, src_iso: str, tgt_iso: str) -> str:
-    if _HAS_MARIAN:
+    return translate_many([text], src_iso, tgt_iso)[0]
+
+def lookup_translation_memory(texts: List[str], src_iso: str, tgt_iso: str) -> Dict[str, str]:
+    if not texts:
+        return {}
+    session = TutorSessionLocal()
+    try:
+        rows = session.query(TranslationMemory.text, TranslationMemory.translation).filter(
+            TranslationMemory.src == src_iso,
+            TranslationMemory.tgt == tgt_iso,
+            TranslationMemory.text.in_(set(texts))
+        ).all()
+        return {text: translation for text, translation in rows}
+    finally:
+        session.close()
+
+def store_translation_memory(pairs: Dict[str, str], src_iso: str, tgt_iso: str):
+    if not pairs:
+        return
+    session = TutorSessionLocal()
+    try:
+        for text, translation in pairs.items():
+            session.add(TranslationMemory(src=src_iso, tgt=tgt_iso, text=text, translation=translation))
+        session.commit()
+    except Exception as e:
+        # A concurrent seed may have stored the same phrase first; the memory is only a cache.
+        session.rollback()
+        logger.warning(f"Failed to store translation memory for {src_iso}-{tgt_iso}: {e}")
+    finally:
+        session.close()
+
+def translate_many(texts: List[str], src_iso: str, tgt_iso: str, batch_size: Optional[int] = None) -> List[str]:
+    """Translate texts, consulting the translation memory first and batching the misses.
+
+    Misses go to the translation service if it is running, otherwise to the
+    in-process model. Only real model output is memorised, so fallback
+    placeholders are retried once MarianMT becomes available.
+    """
+    memory = lookup_translation_memory(texts, src_iso, tgt_iso)
+    missing = list(dict.fromkeys(t for t in texts if t not in memory))
+    outs = None
+    if missing:
+        # The shared service's answer is final, even when it has no model for the pair.
+        remote = _TRANSLATION_CLIENT.translate(missing, src_iso, tgt_iso)
+        if remote is not None:
+            outs = remote
+        elif _HAS_MARIAN:
+            try:
+                outs = translate_batch_with_marian(missing, src_iso, tgt_iso, batch_size)
+            except Exception:
+                outs = None
+        if outs:
+            fresh = {text: out for text, out in zip(missing, outs) if out}
+            store_translation_memory(fresh, src_iso, tgt_iso)
+            memory.update(fresh)
+    return [memory.get(t) or translate_fallback(t, tgt_iso) for t in texts]
+
+class GTTSEngine(TTSEngine):
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str) -> Optional[bytes]:
+        if not _HAS_GTTS:
+            return None
+        buf = io.BytesIO()
         try:
-            out = translate_with_marian(text, src_iso, tgt_iso)
-            if out:
-                return out
+            with metrics.timed("tts", self.name):
+                tts = gtts.gTTS(text=text, lang=lang)
+                tts.write_to_fp(buf)
+            return buf.getvalue()
         except Exception:
-            pass
-    return translate_fallback(text, tgt_iso)
+            return None
+
+TTS_ENGINES: Dict[str, TTSEngine] = {
+    "gtts": GTTSEngine(),
+    "stub": StubTTSEngine(float(os.environ.get("TTS_STUB_DELAY_MS", 0)) / 1000),
+}
+TTS_ENGINE = TTS_ENGINES[os.environ.get("TTS_ENGINE", "gtts")]
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache"))
+TTS_CACHE_MB = int(os.environ.get("TTS_CACHE_MB", 512))
+TTS_MAX_AGE = int(os.environ.get("TTS_MAX_AGE", 86400))
+_TTS_CACHE = AudioCache(TTS_CACHE_DIR, TTS_CACHE_MB * 1024 * 1024)
+
+def tts_file(text: str, lang: str = "en") -> Tuple[Optional[str], str]:
+    """(path, key) of the cached audio. The path is None when synthesis failed;
+    the key is also empty when the cache itself failed, so callers can still synthesise directly."""
+    try:
+        return _TTS_CACHE.get_or_create(TTS_ENGINE, text, lang)
+    except OSError as e:
+        logger.error(f"TTS cache failure: {e}")
+        return None, ""
 
 def tts_bytes(text: str, lang: str = "en") -> Optional[bytes]:
-    if not _HAS_GTTS:
-        return None
-    buf = io.BytesIO()
+    path, key = tts_file(text, lang)
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    return TTS_ENGINE.synthesize(text, lang) if not key else None
+
+def prerender_course_audio(iso: str) -> Dict:
+    """Fill the TTS cache for every card of a course (front in English, back in the course language)."""
+    session = TutorSessionLocal()
     try:
-        tts = gTTS(text=text, lang=lang)
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        return buf.read()
-    except Exception:
-        return None
+        course = session.query(Course).filter(Course.iso == iso).first()
+        if not course:
+            raise ValueError(f"Course '{iso}' not found")
+        pairs = session.query(Card.front, Card.back).filter(Card.course_id == course.id).all()
+    finally:
+        session.close()
+    rendered = failed = 0
+    for front, back in pairs:
+        for text, lang in ((front, "en"), (back, iso)):
+            if not text:
+                continue
+            path, _ = tts_file(text, lang)
+            if path:
+                rendered += 1
+            else:
+                failed += 1
+    return {"iso": iso, "rendered": rendered, "failed": failed}
 
-async def evaluate_pronunciation(expected: str, uploaded_file: UploadFile):
-    if not _HAS_SR:
-        raise HTTPException(status_code=500, detail="speech_recognition not installed on server")
-    suffix = os.path.splitext(uploaded_file.filename)[1] or ".wav"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        data = await uploaded_file.read()
-        tmp.write(data)
-        tmp_path = tmp.name
-    recognizer = sr.Recognizer()
-    transcript = ""
-    try:
-        with sr.AudioFile(tmp_path) as source:
+# ------------------------
+# Speech recognition
+# ------------------------
+class STTEngine:
+    """Interface for speech recognisers used by /practice/evaluate."""
+
+    name = "base"
+
+    def transcribe(self, audio_file, lang: str = "en-US") -> str:
+        raise NotImplementedError
+
+class GoogleSTTEngine(STTEngine):
+    name = "google"
+
+    def transcribe(self, audio_file, lang: str = "en-US") -> str:
+        if not _HAS_SR:
+            raise RuntimeError("speech_recognition not installed on server")
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(audio_file) as source:
+            audio = recognizer.record(source)
+        return recognizer.recognize_google(audio, language=lang)
+
+class SphinxSTTEngine(STTEngine):
+    """Offline recogniser (requires pocketsphinx)."""
+
+    name = "sphinx"
+
+    def transcribe(self, audio_file, lang: str = "en-US") -> str:
+        if not _HAS_SR:
+            raise RuntimeError("speech_recognition not installed on server")
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(audio_file) as source:
             audio = recognizer.record(source)
-            transcript = recognizer.recognize_google(audio)
+        return recognizer.recognize_sphinx(audio)
+
+class StubSTTEngine(STTEngine):
+    """Returns a fixed transcript after an optional delay; for load tests without network."""
+
+    name = "stub"
+
+    def __init__(self, transcript: str = "", delay: float = 0.0):
+        self.transcript = transcript
+        self.delay = delay
+
+    def transcribe(self, audio_file, lang: str = "en-US") -> str:
+        audio_file.read()
+        if self.delay:
+            time.sleep(self.delay)
+        return self.transcript
+
+STT_ENGINES: Dict[str, STTEngine] = {
+    "google": GoogleSTTEngine(),
+    "sphinx": SphinxSTTEngine(),
+    "stub": StubSTTEngine(os.environ.get("STT_STUB_TRANSCRIPT", ""),
+                          float(os.environ.get("STT_STUB_DELAY_MS", 0)) / 1000),
+}
+STT_ENGINE = STT_ENGINES[os.environ.get("STT_ENGINE", "google")]
+STT_MAX_CONCURRENCY = int(os.environ.get("STT_MAX_CONCURRENCY", 4))
+STT_RETRY_AFTER = int(os.environ.get("STT_RETRY_AFTER", 2))
+# Concurrency is capped by the "stt" admission class (see Admission control).
+_STT_EXECUTOR = ThreadPoolExecutor(max_workers=STT_MAX_CONCURRENCY, thread_name_prefix="stt")
+
+def _transcribe(audio_file, lang: str) -> str:
+    with metrics.timed("stt", STT_ENGINE.name):
+        return STT_ENGINE.transcribe(audio_file, lang)
+
+async def evaluate_pronunciation(expected: str, uploaded_file: UploadFile, lang: str = "en-US"):
+    if STT_ENGINE.name in ("google", "sphinx") and not _HAS_SR:
+        raise HTTPException(status_code=500, detail="speech_recognition not installed on server")
+    try:
+        # UploadFile is already spooled (memory, then disk) by the multipart parser,
+        # so the recogniser reads it in place instead of copying it to a temp file.
+        uploaded_file.file.seek(0)
+        loop = asyncio.get_running_loop()
+        transcript = await loop.run_in_executor(_STT_EXECUTOR, _transcribe, uploaded_file.file, lang)
+    except HTTPException:
+        raise
     except Exception as e:
-        os.unlink(tmp_path)
         raise HTTPException(status_code=500, detail=f"STT failed: {e}")
-    os.unlink(tmp_path)
     score = grade_similarity(expected, transcript)
     return {"expected": expected, "transcript": transcript, **score}
 
+# ------------------------
+# Admission control
+# ------------------------
+# TTS synthesis, speech recognition and seeding take seconds each. Every class
+# gets a concurrency limit, a bounded wait queue and a per-client token bucket
+# (see admission.py), so a burst of them cannot take every threadpool thread
+# from cheap endpoints. ADMISSION_STORE=shared keeps the counters in a file
+# mapped by every worker, so the limits hold for the whole host.
+ADMISSION_STORE = os.environ.get("ADMISSION_STORE", "memory")  # memory|shared
+ADMISSION_FILE = os.environ.get(
+    "ADMISSION_FILE",
+    os.path.join(tempfile.gettempdir(),
+                 f"portfolio-admission-{hashlib.sha1(db.TUTOR_DATABASE_URL.encode()).hexdigest()[:12]}.bin"))
+# Behind a reverse proxy the client is the first X-Forwarded-For hop.
+ADMISSION_TRUST_FORWARDED = os.environ.get("ADMISSION_TRUST_FORWARDED", "0") == "1"
+
+def _admission_limits(prefix: str, concurrency: int, queue: int, max_wait: float,
+                      per_minute: float, burst: int, retry_after: int) -> admission.Limits:
+    env = os.environ.get
+    return admission.Limits(
+        concurrency=int(env(f"{prefix}_MAX_CONCURRENCY", concurrency)),
+        queue=int(env(f"{prefix}_MAX_QUEUE", queue)),
+        max_wait=float(env(f"{prefix}_MAX_WAIT", max_wait)),
+        rate=float(env(f"{prefix}_RATE_PER_MINUTE", per_minute)) / 60,
+        burst=int(env(f"{prefix}_RATE_BURST", burst)),
+        retry_after=int(env(f"{prefix}_RETRY_AFTER", retry_after)),
+    )
+
+ADMISSION_CLASSES: Dict[str, admission.Limits] = {
+    "tts": _admission_limits("TTS", 4, 16, 5, 120, 30, 2),
+    "stt": _admission_limits("STT", STT_MAX_CONCURRENCY, 8, 10, 30, 10, STT_RETRY_AFTER),
+    "seed": _admission_limits("SEED", 1, 2, 30, 6, 3, 30),
+}
+_ADMISSION = admission.AdmissionController(
+    admission.SharedStore(ADMISSION_FILE) if ADMISSION_STORE == "shared" else admission.MemoryStore(),
+    ADMISSION_CLASSES)
+_ADMISSION_REJECTED = metrics.REGISTRY.counter(
+    "portfolio_admission_rejected_total", "Requests shed (503) or rate limited (429), by endpoint class.",
+    ("class", "status"))
+
+def client_id(request: Request) -> str:
+    if ADMISSION_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def admit(cls: str, skip=None):
+    """Dependency holding a slot of ``cls`` until the response is sent.
+
+    ``skip(request)`` may return True for requests that are cheap after all.
+    """
+    async def dependency(request: Request):
+        if skip is not None and skip(request):
+            yield
+            return
+        try:
+            await _ADMISSION.acquire(cls, client_id(request))
+        except admission.Rejected as e:
+            _ADMISSION_REJECTED.inc(cls, str(e.status))
+            raise HTTPException(e.status, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+        try:
+            yield
+        finally:
+            _ADMISSION.release(cls)
+    return Depends(dependency)
+
+def _tts_cached(request: Request) -> bool:
+    # Cache hits are a file read; only synthesis needs a slot.
+    params = request.query_params
+    key = AudioCache.key(TTS_ENGINE.name, params.get("text", ""), params.get("lang", "en"))
+    return os.path.exists(_TTS_CACHE.path(key))
+
+@app.get("/admin/admission")
+def admin_admission_stats():
+    return _ADMISSION.stats()
+
 # ------------------------
 # Portfolio Routes (Flask-like)
 # ------------------------
 
+async def _enqueue_contact_message(name: str, email: str, message: str) -> int:
+    async with contact_async_db.session() as session:
+        try:
+            contact_message = ContactMessage(name=name, email=email, message=message, status="pending",
+                                             next_attempt_at=datetime.datetime.utcnow())
+            session.add(contact_message)
+            await session.commit()
+            return contact_message.id
+        except Exception:
+            await session.rollback()
+            raise
+
 @app.post("/api/contact")
 async def contact(request: Request):
     data = await request.json()
@@ -306,66 +846,334 @@ async def contact(request: Request):
 
     logger.info(f"Contact form submission: Name={name}, Email={email}, Message={message}")
 
-    # Save to DB
-    session = ContactSessionLocal()
+    # Save to DB; the outbox sender delivers the email in the background
     try:
-        contact_message = ContactMessage(name=name, email=email, message=message)
-        session.add(contact_message)
-        session.commit()
+        await _enqueue_contact_message(name, email, message)
     except Exception as e:
-        session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        session.close()
-
-    # Send email
-    try:
-        send_email(name, email, message)
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        raise HTTPException(status_code=500, detail="Failed to send message.")
+    _OUTBOX_WAKE.set()
 
     return {"message": "Message received successfully!"}
 
-def send_email(name, email, message):
-    smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-    smtp_port = int(os.environ.get('SMTP_PORT', 587))
-    smtp_username = os.environ.get('SMTP_USERNAME')
-    smtp_password = os.environ.get('SMTP_PASSWORD')
-    recipient_email = os.environ.get('RECIPIENT_EMAIL', smtp_username)
+# ------------------------
+# Email outbox
+# ------------------------
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_SECONDS", 30))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_MAX_SECONDS", 3600))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", 10))
+# A claimed message whose sender died is retried once this lease runs out. The
+# lease is stretched to cover a whole batch of SMTP timeouts (see _outbox_lease).
+OUTBOX_LEASE_SECONDS = float(os.environ.get("OUTBOX_LEASE_SECONDS", 300))
+
+_OUTBOX_WAKE = threading.Event()
+_OUTBOX_STOP = threading.Event()
 
-    if not smtp_username or not smtp_password:
-        raise Exception("SMTP credentials not set.")
+def _smtp_config() -> Dict:
+    username = os.environ.get('SMTP_USERNAME')
+    return {
+        "server": os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        "port": int(os.environ.get('SMTP_PORT', 587)),
+        "username": username,
+        "password": os.environ.get('SMTP_PASSWORD'),
+        "sender": os.environ.get('SMTP_SENDER', username),
+        "recipient": os.environ.get('RECIPIENT_EMAIL', username),
+        "starttls": os.environ.get('SMTP_STARTTLS', '1') == '1',
+        "auth": os.environ.get('SMTP_AUTH', '1') == '1',
+        "timeout": float(os.environ.get('SMTP_TIMEOUT', 30)),
+        "idle_seconds": float(os.environ.get('SMTP_IDLE_SECONDS', 60)),
+    }
 
+def build_contact_email(name, email, message, sender, recipient) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg['From'] = smtp_username
-    msg['To'] = recipient_email
+    msg['From'] = sender
+    msg['To'] = recipient
     msg['Subject'] = f"New Contact from {name}"
 
     body = f"Name: {name}\nEmail: {email}\n\nMessage:\n{message}"
     msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+class SMTPBatchAborted(Exception):
+    """A message that was not attempted because the connection failed earlier in its batch."""
+
+class SMTPConnectionPool:
+    """Keeps one authenticated SMTP connection open and reuses it across sends."""
+
+    def __init__(self):
+        self._conn: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self, cfg: Dict) -> smtplib.SMTP:
+        if cfg["auth"] and (not cfg["username"] or not cfg["password"]):
+            raise Exception("SMTP credentials not set.")
+        conn = smtplib.SMTP(cfg["server"], cfg["port"], timeout=cfg["timeout"])
+        if cfg["starttls"]:
+            conn.starttls()
+        if cfg["auth"]:
+            conn.login(cfg["username"], cfg["password"])
+        return conn
+
+    def _connection(self, cfg: Dict) -> smtplib.SMTP:
+        if self._conn is not None:
+            idle = time.monotonic() - self._last_used
+            try:
+                if idle > cfg["idle_seconds"] or self._conn.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("stale connection")
+            except (smtplib.SMTPException, OSError):
+                self._discard()
+        if self._conn is None:
+            self._conn = self._connect(cfg)
+        return self._conn
+
+    def _discard(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+        self._conn = None
+
+    def send(self, messages: List[MIMEMultipart]) -> List[Optional[Exception]]:
+        """Send a batch over one connection; returns one error (or None) per message.
+
+        A connection-level failure ends the batch: the messages after it get
+        SMTPBatchAborted instead of each waiting out its own connect timeout.
+        """
+        cfg = _smtp_config()
+        errors: List[Optional[Exception]] = []
+        with self._lock:
+            for msg in messages:
+                try:
+                    with metrics.timed("smtp_send", cfg["server"] or ""):
+                        self._connection(cfg).send_message(msg)
+                    errors.append(None)
+                except smtplib.SMTPRecipientsRefused as e:
+                    errors.append(e)
+                except Exception as e:
+                    self._discard()
+                    errors.append(e)
+                    aborted = SMTPBatchAborted(f"not attempted after connection failure: {e}")
+                    errors.extend([aborted] * (len(messages) - len(errors)))
+                    break
+                finally:
+                    self._last_used = time.monotonic()
+        return errors
+
+    def close(self):
+        with self._lock:
+            self._discard()
 
-    server = smtplib.SMTP(smtp_server, smtp_port)
-    server.starttls()
-    server.login(smtp_username, smtp_password)
-    server.send_message(msg)
-    server.quit()
+_SMTP_POOL = SMTPConnectionPool()
+
+def send_email(name, email, message):
+    cfg = _smtp_config()
+    msg = build_contact_email(name, email, message, cfg["sender"], cfg["recipient"])
+    error = _SMTP_POOL.send([msg])[0]
+    if error:
+        raise error
+
+def _outbox_lease() -> datetime.timedelta:
+    # Long enough for a connect plus every message in the batch to hit the SMTP timeout.
+    timeout = _smtp_config()["timeout"]
+    return datetime.timedelta(seconds=max(OUTBOX_LEASE_SECONDS, (OUTBOX_BATCH_SIZE + 1) * timeout + 60))
+
+def _claim_outbox_batch() -> List[ContactMessage]:
+    now = datetime.datetime.utcnow()
+    lease = now + _outbox_lease()
+    session = ContactSessionLocal()
+    try:
+        candidates = session.query(ContactMessage.id).filter(
+            ContactMessage.status.in_(["pending", "sending"]),
+            ContactMessage.next_attempt_at <= now
+        ).order_by(ContactMessage.next_attempt_at).limit(OUTBOX_BATCH_SIZE).all()
+        claimed = []
+        for (msg_id,) in candidates:
+            # Conditional update so two workers never claim the same row.
+            updated = session.query(ContactMessage).filter(
+                ContactMessage.id == msg_id,
+                ContactMessage.status.in_(["pending", "sending"]),
+                ContactMessage.next_attempt_at <= now
+            ).update({"status": "sending", "next_attempt_at": lease}, synchronize_session=False)
+            if updated:
+                claimed.append(msg_id)
+        session.commit()
+        if not claimed:
+            return []
+        rows = session.query(ContactMessage).filter(ContactMessage.id.in_(claimed)).all()
+        session.expunge_all()
+        return rows
+    finally:
+        session.close()
+
+def _outbox_backoff(attempts: int) -> datetime.timedelta:
+    return datetime.timedelta(seconds=min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)))
+
+def drain_outbox() -> int:
+    """Send one batch of due messages; returns how many were claimed."""
+    rows = _claim_outbox_batch()
+    if not rows:
+        return 0
+    cfg = _smtp_config()
+    try:
+        messages = [build_contact_email(r.name, r.email, r.message, cfg["sender"], cfg["recipient"]) for r in rows]
+        errors = _SMTP_POOL.send(messages)
+    except Exception as e:
+        errors = [e] * len(rows)
+    now = datetime.datetime.utcnow()
+    session = ContactSessionLocal()
+    try:
+        for row, error in zip(rows, errors):
+            attempts = (row.attempts or 0) + 1
+            if isinstance(error, SMTPBatchAborted):
+                # Never attempted: retry later without using up one of its attempts.
+                values = {"status": "pending", "last_error": str(error),
+                          "next_attempt_at": now + _outbox_backoff(1)}
+            elif error is None:
+                values = {"status": "sent", "attempts": attempts, "sent_at": now, "last_error": ""}
+            elif attempts >= OUTBOX_MAX_ATTEMPTS:
+                values = {"status": "failed", "attempts": attempts, "last_error": str(error)}
+                logger.error(f"Giving up on contact message {row.id}: {error}")
+            else:
+                values = {"status": "pending", "attempts": attempts, "last_error": str(error),
+                          "next_attempt_at": now + _outbox_backoff(attempts)}
+                logger.warning(f"Failed to send contact message {row.id} (attempt {attempts}): {error}")
+            session.query(ContactMessage).filter(ContactMessage.id == row.id).update(values, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+    return len(rows)
+
+def _outbox_loop():
+    while not _OUTBOX_STOP.is_set():
+        try:
+            claimed = drain_outbox()
+        except Exception as e:
+            logger.error(f"Outbox sender error: {e}")
+            claimed = 0
+        if claimed < OUTBOX_BATCH_SIZE:
+            _OUTBOX_WAKE.wait(OUTBOX_POLL_SECONDS)
+            _OUTBOX_WAKE.clear()
+
+@app.on_event("startup")
+def start_outbox_sender():
+    _OUTBOX_STOP.clear()
+    threading.Thread(target=_outbox_loop, name="contact-outbox", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_outbox_sender():
+    _OUTBOX_STOP.set()
+    _OUTBOX_WAKE.set()
+    _SMTP_POOL.close()
+
+@app.get("/admin/outbox")
+def admin_outbox_stats():
+    session = ContactSessionLocal()
+    try:
+        rows = session.query(ContactMessage.status, func.count(ContactMessage.id)).group_by(ContactMessage.status).all()
+        return {status: count for status, count in rows}
+    finally:
+        session.close()
 
 # ------------------------
 # AI Tutor Routes
 # ------------------------
 
-@app.get("/courses")
-def get_courses():
+# ------------------------
+# Response cache
+# ------------------------
+RESPONSE_CACHE_MB = int(os.environ.get("RESPONSE_CACHE_MB", 32))
+RESPONSE_VERSION_FILE = os.environ.get(
+    "RESPONSE_VERSION_FILE",
+    os.path.join(tempfile.gettempdir(),
+                 f"portfolio-versions-{hashlib.sha1(db.TUTOR_DATABASE_URL.encode()).hexdigest()[:12]}.bin"))
+
+_VERSIONS = VersionCounters(RESPONSE_VERSION_FILE)
+_RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_MB * 1024 * 1024)
+
+def course_changed(course_id: int, catalog: bool = False) -> int:
+    """Invalidate cached responses for a course; ``catalog`` also covers /courses.
+
+    Call after the write has committed. Returns the course's new version.
+    """
+    version = _VERSIONS.bump(course_id)
+    if catalog:
+        _VERSIONS.bump(None)
+    return version
+
+def cached_json(request: Request, key: tuple, build) -> Response:
+    """Serve ``build()`` as JSON from the response cache, answering 304 when the ETag matches.
+
+    ``key`` must include the version(s) the response depends on.
+    """
+    etag = ResponseCache.etag(key, _VERSIONS.epoch)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        _RESPONSE_CACHE.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is None:
+        body = json.dumps(build(), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        _RESPONSE_CACHE.put(key, etag, body)
+    else:
+        body = entry[1]
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/admin/response_cache")
+def admin_response_cache_stats():
+    return _RESPONSE_CACHE.stats()
+
+# ------------------------
+# Card aggregates
+# ------------------------
+def course_card_counts(session, course_ids: Optional[List[int]] = None) -> Dict[int, int]:
+    q = session.query(Card.course_id, func.count(Card.id)).group_by(Card.course_id)
+    if course_ids is not None:
+        q = q.filter(Card.course_id.in_(course_ids))
+    return {course_id: count for course_id, count in q.all()}
+
+def course_stats_aggregate(session, course_id: int, today: datetime.date) -> Dict[str, int]:
+    total, due, mastered = session.query(
+        func.count(Card.id),
+        func.coalesce(func.sum(case((Card.next_review <= today, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Card.repetition >= 5, 1), else_=0)), 0),
+    ).filter(Card.course_id == course_id).one()
+    return {"total_cards": total, "due_today": due, "mastered": mastered}
+
+def due_forecast_aggregate(session, course_id: int, today: datetime.date, days: int) -> List[Dict]:
+    """Due counts for each of the next ``days`` days; overdue cards are due today."""
+    last = today + datetime.timedelta(days=days - 1)
+    due_day = case((Card.next_review < today, today), else_=Card.next_review)
+    rows = session.query(due_day, func.count(Card.id)).filter(
+        Card.course_id == course_id,
+        Card.next_review <= last
+    ).group_by(due_day).all()
+    by_day: Dict[str, int] = {}
+    for day, count in rows:
+        key = day.isoformat() if isinstance(day, datetime.date) else str(day)
+        by_day[key] = by_day.get(key, 0) + count
+    forecast = []
+    for offset in range(days):
+        day = (today + datetime.timedelta(days=offset)).isoformat()
+        forecast.append({"date": day, "due": by_day.get(day, 0)})
+    return forecast
+
+def _courses_payload() -> List[Dict]:
     session = TutorSessionLocal()
     try:
-        courses = session.query(Course).all()
-        return [{"iso": c.iso, "language": c.language, "level": c.level, "card_count": len(c.cards)} for c in courses]
+        courses = session.query(Course.id, Course.iso, Course.language, Course.level).all()
+        counts = course_card_counts(session)
+        return [{"iso": c.iso, "language": c.language, "level": c.level, "card_count": counts.get(c.id, 0)} for c in courses]
     finally:
         session.close()
 
-@app.get("/course/{iso}")
-def get_course(iso: str):
+@app.get("/courses")
+def get_courses(request: Request):
+    return cached_json(request, ("courses", _VERSIONS.get(None)), _courses_payload)
+
+def _course_payload(iso: str) -> Dict:
     session = TutorSessionLocal()
     try:
         course = session.query(Course).filter(Course.iso == iso).first()
@@ -381,19 +1189,255 @@ def get_course(iso: str):
     finally:
         session.close()
 
+def _course_id_or_404_sync(iso: str) -> int:
+    course_id = _COURSE_IDS.get(iso)
+    if course_id is None:
+        session = TutorSessionLocal()
+        try:
+            course_id = course_id_for(session, iso)
+        finally:
+            session.close()
+        if course_id is None:
+            raise HTTPException(404, detail="Course not found")
+    return course_id
+
+CARD_FIELDS = {
+    "id": Card.id, "front": Card.front, "back": Card.back, "hint": Card.hint, "tag": Card.tag,
+    "interval": Card.interval, "repetition": Card.repetition, "efactor": Card.efactor,
+    "next_review": Card.next_review,
+}
+DEFAULT_CARD_FIELDS = ["id", "front", "back", "hint", "tag"]
+COURSE_STREAM_CHUNK = int(os.environ.get("COURSE_STREAM_CHUNK", 1000))
+
+def parse_card_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return DEFAULT_CARD_FIELDS
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in CARD_FIELDS]
+    if unknown:
+        raise HTTPException(400, detail=f"Unknown card fields: {', '.join(unknown)}")
+    # The id is always returned so clients can page and review.
+    return ["id"] + [f for f in names if f != "id"]
+
+def _card_row(row, names: List[str]) -> Dict:
+    out = dict(zip(names, row))
+    if out.get("next_review") is not None:
+        out["next_review"] = out["next_review"].isoformat()
+    return out
+
+def _course_page_payload(iso: str, course_id: int, names: List[str], after: Optional[int], limit: int) -> Dict:
+    session = TutorSessionLocal()
+    try:
+        course = session.get(Course, course_id)
+        q = session.query(*[CARD_FIELDS[n] for n in names]).filter(Card.course_id == course_id)
+        if after is not None:
+            q = q.filter(Card.id > after)
+        rows = q.order_by(Card.id).limit(limit + 1).all()
+        cards = [_card_row(r, names) for r in rows[:limit]]
+        return {
+            "iso": course.iso,
+            "language": course.language,
+            "level": course.level,
+            "description": course.description,
+            "cards": cards,
+            "next_cursor": cards[-1]["id"] if len(rows) > limit else None,
+        }
+    finally:
+        session.close()
+
+def _course_ndjson(course_id: int, names: List[str], after: Optional[int]):
+    session = TutorSessionLocal()
+    try:
+        stmt = select(*[CARD_FIELDS[n] for n in names]).where(Card.course_id == course_id)
+        if after is not None:
+            stmt = stmt.where(Card.id > after)
+        # yield_per streams rows from a server-side cursor instead of fetching them all
+        result = session.execute(stmt.order_by(Card.id).execution_options(yield_per=COURSE_STREAM_CHUNK))
+        for partition in result.partitions():
+            yield "".join(
+                json.dumps(_card_row(r, names), ensure_ascii=False, separators=(",", ":")) + "\n"
+                for r in partition
+            ).encode("utf-8")
+    finally:
+        session.close()
+
+@app.get("/course/{iso}")
+def get_course(request: Request, iso: str,
+               after: Optional[int] = Query(None, ge=0, description="Return cards with id greater than this cursor"),
+               limit: Optional[int] = Query(None, ge=1, le=5000),
+               fields: Optional[str] = Query(None, description="Comma separated card fields"),
+               fmt: Optional[str] = Query(None, alias="format")):
+    """Course details with its cards.
+
+    Without paging parameters the whole course is returned, as before. ``limit``
+    and ``after`` page through cards by id (keyset pagination), and
+    ``format=ndjson`` (or ``Accept: application/x-ndjson``) streams one card per
+    line in constant server memory.
+    """
+    course_id = _course_id_or_404_sync(iso)
+    names = parse_card_fields(fields)
+    if fmt == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(_course_ndjson(course_id, names, after), media_type="application/x-ndjson")
+    version = _VERSIONS.get(course_id)
+    if limit is None and after is None and fields is None:
+        return cached_json(request, ("course", iso, version), lambda: _course_payload(iso))
+    limit = limit or 500
+    key = ("course_page", iso, version, tuple(names), after, limit)
+    return cached_json(request, key, lambda: _course_page_payload(iso, course_id, names, after, limit))
+
+# Registered before /practice/{iso} so "tts" is not taken for a course code.
+@app.get("/practice/tts", dependencies=[admit("tts", skip=_tts_cached)])
+def get_tts(request: Request, text: str = Query(...), lang: str = Query("en")):
+    path, key = tts_file(text, lang)
+    if not path:
+        # Synthesise directly only if the cache failed; otherwise synthesis already did.
+        audio = TTS_ENGINE.synthesize(text, lang) if not key else None
+        if not audio:
+            raise HTTPException(500, detail="TTS not available")
+        return Response(audio, media_type=TTS_ENGINE.media_type)
+    size = os.path.getsize(path)
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={TTS_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") in (headers["ETag"], "*"):
+        return Response(status_code=304, headers=headers)
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range:
+        start, end = byte_range
+        with open(path, "rb") as f:
+            f.seek(start)
+            chunk = f.read(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(chunk, status_code=206, media_type=TTS_ENGINE.media_type, headers=headers)
+    return FileResponse(path, media_type=TTS_ENGINE.media_type, headers=headers)
+
+# ------------------------
+# Due queue
+# ------------------------
+DUE_QUEUE_ENABLED = os.environ.get("DUE_QUEUE_ENABLED", "1") == "1"
+DUE_QUEUE_TTL = float(os.environ.get("DUE_QUEUE_TTL", 30))
+DUE_QUEUE_RELOAD_INTERVAL = float(os.environ.get("DUE_QUEUE_RELOAD_INTERVAL", 10))
+# Each worker keeps its own queue; a course is reloaded once another worker's
+# write moves its shared version (see course_changed).
+
+def card_payload(card) -> Dict:
+    return {"front": card.front, "back": card.back, "hint": card.hint, "tag": card.tag}
+
+def _load_due_queue(course_id: int):
+    session = TutorSessionLocal()
+    try:
+        rows = session.query(Card.id, Card.next_review, Card.front, Card.back, Card.hint, Card.tag).filter(
+            Card.course_id == course_id
+        ).all()
+        return [(r.id, r.next_review, card_payload(r)) for r in rows]
+    finally:
+        session.close()
+
+_DUE_QUEUE = DueQueue(_load_due_queue, ttl=DUE_QUEUE_TTL, version=_VERSIONS.get,
+                      reload_interval=DUE_QUEUE_RELOAD_INTERVAL)
+_COURSE_IDS: Dict[str, int] = {}
+
+def course_id_for(session, iso: str) -> Optional[int]:
+    course_id = _COURSE_IDS.get(iso)
+    if course_id is None:
+        row = session.query(Course.id).filter(Course.iso == iso).first()
+        if row is None:
+            return None
+        course_id = _COURSE_IDS[iso] = row.id
+    return course_id
+
 @app.get("/practice/{iso}")
 def get_practice_cards(iso: str, limit: int = Query(10, ge=1, le=50)):
+    today = datetime.date.today()
+    if DUE_QUEUE_ENABLED and iso in _COURSE_IDS:
+        cards = _DUE_QUEUE.due(_COURSE_IDS[iso], today, limit)
+        if cards is not None:
+            return cards
     session = TutorSessionLocal()
     try:
-        course = session.query(Course).filter(Course.iso == iso).first()
-        if not course:
+        course_id = course_id_for(session, iso)
+        if course_id is None:
             raise HTTPException(404, detail="Course not found")
-        today = datetime.date.today()
+        if DUE_QUEUE_ENABLED:
+            cards = _DUE_QUEUE.due(course_id, today, limit)
+            if cards is not None:
+                return cards
+        # Not loaded, or stale after another worker's write: the queue rebuilds
+        # in the background and this request uses the indexed query.
         due_cards = session.query(Card).filter(
-            Card.course_id == course.id,
+            Card.course_id == course_id,
             Card.next_review <= today
         ).order_by(Card.next_review).limit(limit).all()
-        return [{"id": c.id, "front": c.front, "back": c.back, "hint": c.hint, "tag": c.tag} for c in due_cards]
+        return [{"id": c.id, **card_payload(c)} for c in due_cards]
+    finally:
+        session.close()
+
+class ReviewItem(BaseModel):
+    card_id: int
+    quality: int = Field(..., ge=0, le=5)
+
+class BatchReviewReq(BaseModel):
+    reviews: List[ReviewItem] = Field(..., max_length=5000)
+
+def apply_review_batch(session, reviews: List[ReviewItem]) -> Tuple[List[Dict], List[int], Dict[int, int]]:
+    """Apply SM-2 to a batch of reviews and write them back with one bulk UPDATE.
+
+    Reviews of the same card are applied in the order given. Returns the updated
+    rows, the ids that do not exist and each updated card's course id. The caller commits.
+    """
+    ids = {r.card_id for r in reviews}
+    rows = session.query(Card.id, Card.course_id, Card.repetition, Card.interval, Card.efactor).filter(
+        Card.id.in_(ids)
+    ).all()
+    state = {r.id: {"course_id": r.course_id, "repetition": r.repetition, "interval": r.interval,
+                    "efactor": r.efactor} for r in rows}
+    missing = sorted(ids - state.keys())
+    pending = [r for r in reviews if r.card_id in state]
+    # Each round holds at most one review per card so it can be vectorised.
+    while pending:
+        this_round, seen, later = [], set(), []
+        for r in pending:
+            (later if r.card_id in seen else this_round).append(r)
+            seen.add(r.card_id)
+        cards = [state[r.card_id] for r in this_round]
+        new = sm2_update_batch([c["repetition"] for c in cards], [c["interval"] for c in cards],
+                               [c["efactor"] for c in cards], [r.quality for r in this_round])
+        for card, rep, ivl, ef, nr in zip(cards, *new):
+            card.update(repetition=rep, interval=ivl, efactor=ef, next_review=nr)
+        pending = later
+    updates = [
+        {"id": cid, "repetition": c["repetition"], "interval": c["interval"], "efactor": c["efactor"],
+         "next_review": c["next_review"]}
+        for cid, c in state.items() if "next_review" in c
+    ]
+    if updates:
+        session.execute(update(Card), updates)
+    return updates, missing, {u["id"]: state[u["id"]]["course_id"] for u in updates}
+
+# Registered before /review/{card_id} so "batch" is not parsed as a card id.
+@app.post("/review/batch")
+def review_cards_batch(req: BatchReviewReq):
+    session = TutorSessionLocal()
+    try:
+        updates, missing, course_of = apply_review_batch(session, req.reviews)
+        session.commit()
+        versions = {course_id: course_changed(course_id) for course_id in set(course_of.values())}
+        for u in updates:
+            course_id = course_of[u["id"]]
+            _DUE_QUEUE.update(course_id, u["id"], u["next_review"], version=versions[course_id])
+        return {
+            "message": f"Reviewed {len(updates)} cards",
+            "results": [{"card_id": u["id"], "next_review": u["next_review"].isoformat()} for u in updates],
+            "missing": missing,
+        }
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(500, detail=str(e))
     finally:
         session.close()
 
@@ -406,105 +1450,423 @@ def review_card(card_id: int, quality: int = Body(..., ge=0, le=5)):
             raise HTTPException(404, detail="Card not found")
         sm2_update(card, quality)
         session.commit()
+        version = course_changed(card.course_id)
+        _DUE_QUEUE.update(card.course_id, card.id, card.next_review, version=version)
         return {"message": "Card reviewed", "next_review": card.next_review.isoformat()}
+    except HTTPException:
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(500, detail=str(e))
     finally:
         session.close()
 
-@app.get("/practice/tts")
-def get_tts(text: str = Query(...), lang: str = Query("en")):
-    audio = tts_bytes(text, lang)
-    if not audio:
-        raise HTTPException(500, detail="TTS not available")
-    return StreamingResponse(io.BytesIO(audio), media_type="audio/mpeg")
-
-@app.post("/practice/evaluate")
-async def post_evaluate_pronunciation(expected: str = Query(...), file: UploadFile = File(...)):
-    result = await evaluate_pronunciation(expected, file)
+@app.post("/practice/evaluate", dependencies=[admit("stt")])
+async def post_evaluate_pronunciation(expected: str = Query(...), lang: str = Query("en-US"), file: UploadFile = File(...)):
+    result = await evaluate_pronunciation(expected, file, lang)
     return result
 
+class GradeItem(BaseModel):
+    expected: str
+    answer: str
+
+class BatchGradeReq(BaseModel):
+    items: List[GradeItem] = Field(..., max_length=GRADE_BATCH_MAX)
+
+@app.post("/grade/batch")
+def post_grade_batch(req: BatchGradeReq):
+    results = grade_batch([i.expected for i in req.items], [i.answer for i in req.items])
+    return {"results": results}
+
+class MatchReq(BaseModel):
+    answer: str
+    limit: int = Field(5, ge=1, le=50)
+    side: str = Field("back", pattern="^(front|back)$")
+
+@app.post("/course/{iso}/match")
+def match_card(iso: str, req: MatchReq):
+    """Which card did the learner mean? Ranks the whole deck against one answer."""
+    course_id = _course_id_or_404_sync(iso)
+    session = TutorSessionLocal()
+    try:
+        rows = session.query(Card.id, Card.front, Card.back).filter(Card.course_id == course_id).order_by(Card.id).all()
+    finally:
+        session.close()
+    choices = [(r.front if req.side == "front" else r.back) or "" for r in rows]
+    best = grading.best_matches(req.answer, choices, req.limit, workers=GRADE_WORKERS)
+    grades = grading.grade_bands([sim for _, sim in best])
+    return {
+        "answer": req.answer,
+        "matches": [{"id": rows[i].id, "front": rows[i].front, "back": rows[i].back,
+                     **grading.grade_result(sim, grade)} for (i, sim), grade in zip(best, grades)],
+    }
+
 # Admin endpoints
 class SeedReq(BaseModel):
     iso: str
     level: Optional[str] = "A1"
 
-@app.post("/admin/seed_language")
-def admin_seed_language(req: SeedReq):
-    iso = req.iso.lower().strip()
-    if iso not in LANGUAGES:
-        raise HTTPException(404, detail=f"Language '{iso}' not recognized.")
+def seed_course(iso: str, level: Optional[str] = "A1") -> Dict:
+    """Create the starter course for ``iso`` unless it already exists."""
     session = TutorSessionLocal()
     try:
         name = LANGUAGES[iso]
         existing = session.query(Course).filter(Course.iso == iso).first()
         if existing:
             return {"message": f"Course for {name} already exists."}
-        course = Course(language=name, iso=iso, level=req.level, description=f"Beginner {name} phrases")
+        course = Course(language=name, iso=iso, level=level, description=f"Beginner {name} phrases")
         session.add(course)
         session.commit()
-        for phrase in STARTER_PHRASES:
-            translated = translate(phrase, "en", iso)
+        translations = translate_many(STARTER_PHRASES, "en", iso)
+        for phrase, translated in zip(STARTER_PHRASES, translations):
             card = Card(course_id=course.id, front=phrase, back=translated, tag="phrase")
             session.add(card)
         session.commit()
+        course_changed(course.id, catalog=True)
         return {"message": f"Seeded {len(STARTER_PHRASES)} cards for {name}."}
-    except Exception as e:
+    except Exception:
         session.rollback()
+        raise
+    finally:
+        session.close()
+
+@app.post("/admin/seed_language", dependencies=[admit("seed")])
+def admin_seed_language(req: SeedReq):
+    iso = req.iso.lower().strip()
+    if iso not in LANGUAGES:
+        raise HTTPException(404, detail=f"Language '{iso}' not recognized.")
+    try:
+        return seed_course(iso, req.level)
+    except Exception as e:
         raise HTTPException(500, detail=str(e))
+
+# ------------------------
+# Background seed jobs
+# ------------------------
+SEED_JOB_WORKERS = int(os.environ.get("SEED_JOB_WORKERS", 2))
+SEED_JOB_MEMORY_MB = int(os.environ.get("SEED_JOB_MEMORY_MB", 0))  # 0 = no cap
+# Pool workers start from a clean process rather than a fork of this
+# multi-threaded one, whose locks may be held by other threads at fork time.
+SEED_JOB_START_METHOD = os.environ.get("SEED_JOB_START_METHOD", "forkserver")
+SEED_JOB_STALE_SECONDS = int(os.environ.get("SEED_JOB_STALE_SECONDS", 60))
+
+_SEED_JOB_THREADS: Dict[int, threading.Thread] = {}
+_SEED_JOB_LOCK = threading.Lock()
+
+def _seed_worker_init(memory_mb: int):
+    # Connections inherited from the parent must not be shared with the child.
+    tutor_engine.dispose(close=False)
+    if memory_mb > 0:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _seed_worker_task(iso: str, level: str) -> Dict:
+    return seed_course(iso, level)
+
+def _seed_job_payload(session, job: SeedJob) -> Dict:
+    rows = session.query(SeedJobLanguage).filter(SeedJobLanguage.job_id == job.id).all()
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row.status] = counts.get(row.status, 0) + 1
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "level": job.level,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "error": job.error,
+        "total": len(rows),
+        "counts": counts,
+        "failed": [{"iso": r.iso, "message": r.message} for r in rows if r.status == "failed"],
+    }
+
+def _seed_job_is_stale(job: SeedJob) -> bool:
+    if not job.heartbeat_at:
+        return True
+    age = datetime.datetime.utcnow() - job.heartbeat_at
+    return age.total_seconds() > SEED_JOB_STALE_SECONDS
+
+def _mark_seed_language(job_id: int, iso: str, status: str, message: str = ""):
+    session = TutorSessionLocal()
+    try:
+        row = session.query(SeedJobLanguage).filter(
+            SeedJobLanguage.job_id == job_id, SeedJobLanguage.iso == iso
+        ).first()
+        row.status = status
+        row.message = message
+        if status in ("done", "failed", "cancelled"):
+            row.finished_at = datetime.datetime.utcnow()
+        job = session.get(SeedJob, job_id)
+        job.heartbeat_at = datetime.datetime.utcnow()
+        session.commit()
+        return job.status
     finally:
         session.close()
 
-@app.post("/admin/seed_all_languages")
-def admin_seed_all_languages():
-    results = []
-    for iso in LANGUAGES:
-        try:
-            req = SeedReq(iso=iso)
-            result = admin_seed_language(req)
-            results.append(result)
-        except Exception as e:
-            results.append({"error": f"Failed to seed {iso}: {str(e)}"})
-    return {"results": results}
+def _touch_seed_job(job_id: int) -> Optional[str]:
+    session = TutorSessionLocal()
+    try:
+        job = session.get(SeedJob, job_id)
+        job.heartbeat_at = datetime.datetime.utcnow()
+        session.commit()
+        return job.status
+    finally:
+        session.close()
+
+def _finish_seed_job(job_id: int, status: str, error: str = ""):
+    session = TutorSessionLocal()
+    try:
+        job = session.get(SeedJob, job_id)
+        session.query(SeedJobLanguage).filter(
+            SeedJobLanguage.job_id == job_id,
+            SeedJobLanguage.status.in_(["pending", "running"])
+        ).update({"status": "cancelled" if status == "cancelled" else "pending"}, synchronize_session=False)
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.datetime.utcnow()
+        session.commit()
+    finally:
+        session.close()
+
+def _record_seed_result(job_id: int, iso: str, fut) -> Optional[str]:
+    try:
+        return _mark_seed_language(job_id, iso, "done", fut.result()["message"])
+    except Exception as e:
+        return _mark_seed_language(job_id, iso, "failed", str(e) or type(e).__name__)
+
+def _run_seed_job(job_id: int):
+    session = TutorSessionLocal()
+    try:
+        job = session.get(SeedJob, job_id)
+        level = job.level
+        # Languages left "running" by a dead controller are retried; finished ones are skipped.
+        pending = [row.iso for row in session.query(SeedJobLanguage).filter(
+            SeedJobLanguage.job_id == job_id,
+            SeedJobLanguage.status.in_(["pending", "running"])
+        ).order_by(SeedJobLanguage.id)]
+        # Conditional, so a cancel that landed since start_seed_job committed is not overwritten.
+        started = session.query(SeedJob).filter(SeedJob.id == job_id, SeedJob.status == "pending").update(
+            {"status": "running", "heartbeat_at": datetime.datetime.utcnow()}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+    if not started:
+        _finish_seed_job(job_id, "cancelled")
+        with _SEED_JOB_LOCK:
+            _SEED_JOB_THREADS.pop(job_id, None)
+        return
+
+    status = "done"
+    error = ""
+    try:
+        ctx = multiprocessing.get_context(SEED_JOB_START_METHOD)
+        with ProcessPoolExecutor(max_workers=max(1, SEED_JOB_WORKERS), mp_context=ctx,
+                                 initializer=_seed_worker_init, initargs=(SEED_JOB_MEMORY_MB,)) as pool:
+            in_flight = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < max(1, SEED_JOB_WORKERS):
+                    iso = pending.pop(0)
+                    _mark_seed_language(job_id, iso, "running")
+                    in_flight[pool.submit(_seed_worker_task, iso, level)] = iso
+                done, _ = wait(in_flight, timeout=5, return_when=FIRST_COMPLETED)
+                job_status = None
+                for fut in done:
+                    job_status = _record_seed_result(job_id, in_flight.pop(fut), fut)
+                if not done:
+                    job_status = _touch_seed_job(job_id)
+                if job_status == "cancelling":
+                    # Queued languages are dropped; running ones cannot be interrupted,
+                    # so wait for them and record how they actually ended.
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    for fut, iso in in_flight.items():
+                        if not fut.cancelled():
+                            _record_seed_result(job_id, iso, fut)
+                    status = "cancelled"
+                    break
+    except Exception as e:
+        logger.error(f"Seed job {job_id} failed: {e}")
+        status, error = "failed", str(e)
+    finally:
+        _finish_seed_job(job_id, status, error)
+        with _SEED_JOB_LOCK:
+            _SEED_JOB_THREADS.pop(job_id, None)
+
+def start_seed_job(level: str = "A1") -> Dict:
+    """Start (or resume) the background job that seeds every language.
+
+    A live job is returned as-is. An unfinished job whose controller stopped
+    heartbeating (server restart, crash) is resumed, skipping languages that
+    already finished.
+    """
+    session = TutorSessionLocal()
+    try:
+        job = session.query(SeedJob).filter(
+            SeedJob.status.in_(["pending", "running", "cancelling"])
+        ).order_by(SeedJob.id.desc()).first()
+        if job and not _seed_job_is_stale(job):
+            return _seed_job_payload(session, job)
+        if job is None:
+            job = SeedJob(level=level, status="pending")
+            session.add(job)
+            session.flush()
+            for iso in LANGUAGES:
+                session.add(SeedJobLanguage(job_id=job.id, iso=iso))
+        else:
+            job.status = "pending"
+        job.heartbeat_at = datetime.datetime.utcnow()
+        session.commit()
+        job_id = job.id
+        with _SEED_JOB_LOCK:
+            thread = threading.Thread(target=_run_seed_job, args=(job_id,), name=f"seed-job-{job_id}", daemon=True)
+            _SEED_JOB_THREADS[job_id] = thread
+            thread.start()
+        return _seed_job_payload(session, job)
+    finally:
+        session.close()
+
+@app.post("/admin/seed_all_languages", status_code=202, dependencies=[admit("seed")])
+def admin_seed_all_languages(level: Optional[str] = Body("A1", embed=True)):
+    return start_seed_job(level or "A1")
+
+@app.post("/admin/seed_jobs", status_code=202, dependencies=[admit("seed")])
+def admin_start_seed_job(level: Optional[str] = Body("A1", embed=True)):
+    return start_seed_job(level or "A1")
+
+@app.get("/admin/seed_jobs/{job_id}")
+def admin_get_seed_job(job_id: int):
+    session = TutorSessionLocal()
+    try:
+        job = session.get(SeedJob, job_id)
+        if not job:
+            raise HTTPException(404, detail="Seed job not found")
+        return _seed_job_payload(session, job)
+    finally:
+        session.close()
+
+@app.post("/admin/seed_jobs/{job_id}/cancel")
+def admin_cancel_seed_job(job_id: int):
+    session = TutorSessionLocal()
+    try:
+        job = session.get(SeedJob, job_id)
+        if not job:
+            raise HTTPException(404, detail="Seed job not found")
+        if job.status in ("pending", "running", "cancelling"):
+            if _seed_job_is_stale(job):
+                # No live controller to notice the request; cancel directly.
+                _finish_seed_job(job_id, "cancelled")
+                session.expire_all()
+            else:
+                # The controller (possibly in another worker) polls for this status.
+                job.status = "cancelling"
+                session.commit()
+        return _seed_job_payload(session, job)
+    finally:
+        session.close()
+
+@app.on_event("startup")
+def warm_up_models():
+    if MARIAN_WARMUP and _HAS_MARIAN:
+        loaded = warm_marian_cache(MARIAN_WARMUP)
+        logger.info(f"Marian warm-up: {loaded}")
+
+@app.get("/admin/marian_cache")
+def admin_marian_cache_stats():
+    return _MARIAN_CACHE.stats()
+
+@app.get("/admin/db")
+def admin_db_settings():
+    return {"contact": db.describe(contact_engine), "tutor": db.describe(tutor_engine)}
+
+@app.on_event("shutdown")
+async def dispose_async_engines():
+    await contact_async_db.dispose()
+    await tutor_async_db.dispose()
+
+@app.get("/admin/tts_cache")
+def admin_tts_cache_stats():
+    return {"engine": TTS_ENGINE.name, **_TTS_CACHE.stats()}
 
 # Cool features
+def _course_stats_payload(course_id: int, today: datetime.date) -> Dict:
+    session = TutorSessionLocal()
+    try:
+        stats = course_stats_aggregate(session, course_id, today)
+        return {**stats, "progress": f"{stats['mastered']}/{stats['total_cards']}"}
+    finally:
+        session.close()
+
 @app.get("/course/{iso}/stats")
-def get_course_stats(iso: str):
+def get_course_stats(request: Request, iso: str):
+    course_id = _course_id_or_404_sync(iso)
+    today = datetime.date.today()
+    # "due today" changes with the date even when nothing is written
+    key = ("stats", iso, _VERSIONS.get(course_id), today.isoformat())
+    return cached_json(request, key, lambda: _course_stats_payload(course_id, today))
+
+@app.get("/course/{iso}/forecast")
+def get_course_forecast(iso: str, days: int = Query(7, ge=1, le=365)):
     session = TutorSessionLocal()
     try:
         course = session.query(Course).filter(Course.iso == iso).first()
         if not course:
             raise HTTPException(404, detail="Course not found")
-        total_cards = len(course.cards)
-        due_today = len([c for c in course.cards if c.next_review <= datetime.date.today()])
-        mastered = len([c for c in course.cards if c.repetition >= 5])
-        return {
-            "total_cards": total_cards,
-            "due_today": due_today,
-            "mastered": mastered,
-            "progress": f"{mastered}/{total_cards}"
-        }
+        return {"iso": iso, "forecast": due_forecast_aggregate(session, course.id, datetime.date.today(), days)}
     finally:
         session.close()
 
+TRANSLATE_MAX_TEXTS = int(os.environ.get("TRANSLATE_MAX_TEXTS", 100))
+
+class TranslateReq(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=TRANSLATE_MAX_TEXTS)
+    src: str = "en"
+    tgt: str
+
+@app.post("/translate")
+def translate_texts(req: TranslateReq):
+    for iso in (req.src, req.tgt):
+        if iso not in LANGUAGES:
+            raise HTTPException(400, detail=f"Unknown language: {iso}")
+    return {"src": req.src, "tgt": req.tgt, "translations": translate_many(req.texts, req.src, req.tgt)}
+
+@app.get("/admin/translation")
+def admin_translation_stats():
+    return _TRANSLATION_CLIENT.stats()
+
 class AddCardReq(BaseModel):
     front: str
-    back: str
+    back: Optional[str] = None
     hint: Optional[str] = ""
     tag: Optional[str] = "custom"
+    # Fill in a missing back by translating the front from `src` into the course language.
+    auto_translate: bool = False
+    src: str = "en"
 
 @app.post("/course/{iso}/add_card")
 def add_custom_card(iso: str, req: AddCardReq):
+    back = req.back
+    if not back:
+        if not req.auto_translate:
+            raise HTTPException(400, detail="back is required unless auto_translate is set")
+        if req.src not in LANGUAGES:
+            raise HTTPException(400, detail=f"Unknown language: {req.src}")
+        # Translate before opening the write session; inference can take a while.
+        _course_id_or_404_sync(iso)
+        back = translate(req.front, req.src, iso)
     session = TutorSessionLocal()
     try:
         course = session.query(Course).filter(Course.iso == iso).first()
         if not course:
             raise HTTPException(404, detail="Course not found")
-        card = Card(course_id=course.id, front=req.front, back=req.back, hint=req.hint, tag=req.tag)
+        card = Card(course_id=course.id, front=req.front, back=back, hint=req.hint, tag=req.tag)
         session.add(card)
         session.commit()
-        return {"message": "Card added", "card_id": card.id}
+        version = course_changed(course.id, catalog=True)
+        _DUE_QUEUE.update(course.id, card.id, card.next_review, card_payload(card), version=version)
+        return {"message": "Card added", "card_id": card.id, "back": back}
+    except HTTPException:
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(500, detail=str(e))
@@ -518,17 +1880,256 @@ def reset_course_progress(iso: str):
         course = session.query(Course).filter(Course.iso == iso).first()
         if not course:
             raise HTTPException(404, detail="Course not found")
-        for card in course.cards:
-            card.interval = 1
-            card.repetition = 0
-            card.efactor = 2.5
-            card.next_review = datetime.date.today()
+        session.query(Card).filter(Card.course_id == course.id).update({
+            "interval": 1,
+            "repetition": 0,
+            "efactor": 2.5,
+            "next_review": datetime.date.today(),
+        }, synchronize_session=False)
         session.commit()
+        _DUE_QUEUE.invalidate(course.id)
+        course_changed(course.id)
         return {"message": f"Progress reset for {course.language}"}
     finally:
         session.close()
 
+# ------------------------
+# Bulk card import
+# ------------------------
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", 100))
+
+async def _insert_cards(course_id: int, cards: List[Dict]):
+    async with tutor_async_db.session() as session:
+        today = datetime.date.today()
+        # One executemany per chunk, committed on its own so transactions stay bounded.
+        await session.execute(insert(Card), [
+            {**card, "course_id": course_id, "interval": 1, "repetition": 0, "efactor": 2.5, "next_review": today}
+            for card in cards
+        ])
+        await session.commit()
+
+async def _course_id_or_404(iso: str) -> int:
+    async with tutor_async_db.session() as session:
+        course_id = await session.run_sync(course_id_for, iso)
+        if course_id is None:
+            raise HTTPException(404, detail="Course not found")
+        return course_id
+
+@app.post("/course/{iso}/import")
+async def import_cards(iso: str, request: Request, fmt: Optional[str] = Query(None, alias="format")):
+    """Stream cards from a CSV, NDJSON or Anki TSV request body into a course.
+
+    The body is parsed as it arrives and inserted in chunks, so imports of any
+    size run in constant memory. Rows that fail validation are reported by line.
+    """
+    fmt = (fmt or card_import.detect_format(request.headers.get("content-type")) or "").lower()
+    if fmt not in card_import.FORMATS:
+        raise HTTPException(400, detail=f"Unknown import format; use one of {', '.join(card_import.FORMATS)}.")
+    course_id = await _course_id_or_404(iso)
+
+    imported = failed = 0
+    errors: List[Dict] = []
+    chunk: List[Dict] = []
+    try:
+        async for line_no, card, error in card_import.parse(fmt, request.stream()):
+            if error:
+                failed += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"line": line_no, "error": error})
+                continue
+            chunk.append(card)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await _insert_cards(course_id, chunk)
+                imported += len(chunk)
+                chunk = []
+        if chunk:
+            await _insert_cards(course_id, chunk)
+            imported += len(chunk)
+    except Exception as e:
+        # Chunks committed before the failure stay imported.
+        raise HTTPException(500, detail=f"Import stopped after {imported} cards: {e}")
+    finally:
+        _DUE_QUEUE.invalidate(course_id)
+        course_changed(course_id, catalog=True)
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+# ------------------------
+# Metrics
+# ------------------------
+# MetricsMiddleware (added with the other middleware above) records every
+# request; SQL statements are counted per request on all engines. Set
+# METRICS_DIR to a directory shared by the gunicorn workers so /metrics
+# reports the whole deployment instead of the worker that served the scrape.
+METRICS_QUERY_WARN = int(os.environ.get("METRICS_QUERY_WARN", 50))
+# Opt-in: lets /admin/profiler sample the running workers' stacks.
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+
+metrics.track_queries({"tutor": db.TUTOR_DATABASE_URL, "contact": db.CONTACT_DATABASE_URL},
+                      warn_above=METRICS_QUERY_WARN)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def _endpoint_codes(route: str) -> set:
+    codes = {r.endpoint.__code__ for r in app.routes
+             if getattr(r, "path_format", None) == route and hasattr(getattr(r, "endpoint", None), "__code__")}
+    if not codes:
+        raise ValueError(f"No route {route!r}")
+    return codes
+
+_PROFILER = ProfilerControl(_endpoint_codes, os.path.join(metrics.REGISTRY.directory, "profiles")
+                            if metrics.REGISTRY.directory else None)
+
+class ProfileReq(BaseModel):
+    seconds: float = Field(10, gt=0, le=300)
+    route: Optional[str] = None  # route template, e.g. "/practice/{iso}"; all threads when omitted
+    interval_ms: float = Field(5, ge=1, le=1000)
+
+def _profiler_or_404():
+    if not PROFILER_ENABLED:
+        raise HTTPException(404, detail="Profiler disabled; set PROFILER_ENABLED=1")
+    return _PROFILER
+
+@app.on_event("startup")
+def start_profiler_watch():
+    if PROFILER_ENABLED:
+        _PROFILER.watch()
+
+@app.post("/admin/profiler", status_code=202)
+def admin_start_profiler(req: ProfileReq):
+    try:
+        return _profiler_or_404().start(req.seconds, req.route, req.interval_ms)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+
+@app.get("/admin/profiler")
+def admin_profiler_status():
+    return _profiler_or_404().status()
+
+@app.get("/admin/profiler/flamegraph")
+def admin_profiler_flamegraph(profile_id: Optional[str] = Query(None, alias="id")):
+    """Folded stacks of the latest (or given) profile, for flamegraph.pl or speedscope."""
+    folded = _profiler_or_404().folded(profile_id)
+    if folded is None:
+        raise HTTPException(404, detail="No finished profile")
+    return Response(folded, media_type="text/plain; charset=utf-8")
+
+# ------------------------
+# Worker processes
+# ------------------------
+# With `gunicorn --preload` the master imports this module once and forks the
+# workers from it. MARIAN_PRELOAD=1 also loads the MARIAN_WARMUP models in the
+# master so every worker shares one copy of the weights (copy-on-write) instead
+# of loading its own on startup.
+MARIAN_PRELOAD = os.environ.get("MARIAN_PRELOAD", "0") == "1"
+_FORK_STATE: Dict[str, int] = {}
+
+def preload_models() -> Dict[str, bool]:
+    if not (_HAS_MARIAN and MARIAN_WARMUP):
+        return {}
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    lazy_imports.load(torch)
+    # Load single-threaded so no intra-op thread pool exists at fork time;
+    # forked children would deadlock on it. Workers restore the real count.
+    _FORK_STATE["torch_threads"] = torch.get_num_threads()
+    torch.set_num_threads(1)
+    loaded = warm_marian_cache(MARIAN_WARMUP)
+    # Keep the workers' garbage collector from touching (and so un-sharing)
+    # every page the master allocated.
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+def _after_fork_in_child():
+    # Pooled connections opened in the parent must not be shared with the child.
+    contact_engine.dispose(close=False)
+    tutor_engine.dispose(close=False)
+    if lazy_imports.is_loaded(torch) and "torch_threads" in _FORK_STATE:
+        torch.set_num_threads(MARIAN_INFERENCE["threads"] or _FORK_STATE["torch_threads"])
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+if MARIAN_PRELOAD:
+    logger.info(f"Marian preload: {preload_models()}")
+
+# ------------------------
+# React build (keep last: the catch-all route must come after every API route)
+# ------------------------
+STATIC_DIR = os.environ.get("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+_STATIC = StaticSite(
+    STATIC_DIR,
+    max_age=int(os.environ.get("STATIC_MAX_AGE", 3600)),
+    hot_file_kb=int(os.environ.get("STATIC_HOT_FILE_KB", 256)),
+    hot_cache_mb=int(os.environ.get("STATIC_HOT_CACHE_MB", 32)),
+)
+_API_PREFIXES: Optional[set] = None
+
+def _is_api_path(path: str) -> bool:
+    global _API_PREFIXES
+    if _API_PREFIXES is None:
+        _API_PREFIXES = {r.path.strip("/").split("/")[0] for r in app.routes
+                         if getattr(r, "path", "") and not r.path.startswith("/{")} - {""}
+    return path.split("/", 1)[0] in _API_PREFIXES
+
+@app.get("/admin/static")
+def admin_static_stats():
+    return _STATIC.stats()
+
+_ALL_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+def _allowed_methods(request: Request) -> List[str]:
+    """Methods of the API routes whose path matches the request (for a 405 instead of 404)."""
+    allowed = set()
+    for route in app.routes:
+        if route.path == "/{full_path:path}":
+            continue
+        match, _ = route.matches(request.scope)
+        if match == Match.PARTIAL:
+            allowed.update(getattr(route, "methods", None) or ())
+    return sorted(allowed)
+
+def _frontend_response(full_path: str, args: Tuple) -> Response:
+    response = _STATIC.response(full_path, *args)
+    if response is not None:
+        return response
+    # Client-side routes get the SPA shell; missing files and unknown API paths stay 404.
+    last = full_path.rsplit("/", 1)[-1]
+    if "." not in last and not _is_api_path(full_path):
+        response = _STATIC.response(_STATIC.index, *args)
+        if response is not None:
+            return response
+    raise HTTPException(404, detail="Not Found")
+
+# Registered for every method so unknown paths answer 404 rather than 405.
+@app.api_route("/{full_path:path}", methods=_ALL_METHODS, include_in_schema=False)
+async def serve_frontend(full_path: str, request: Request):
+    if request.method not in ("GET", "HEAD"):
+        allowed = _allowed_methods(request)
+        if allowed:
+            raise HTTPException(405, detail="Method Not Allowed", headers={"Allow": ", ".join(allowed)})
+        raise HTTPException(404, detail="Not Found")
+    headers = request.headers
+    args = (request.method, headers.get("accept-encoding"), headers.get("if-none-match"))
+    # Hashed bundles already in memory are answered here; anything needing a
+    # stat or a read goes to the threadpool.
+    response = _STATIC.cached_response(full_path, *args)
+    if response is not None:
+        return response
+    return await run_in_threadpool(_frontend_response, full_path, args)
+
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == "prerender-tts":
+        # python app.py prerender-tts fr es ...
+        for course_iso in sys.argv[2:]:
+            print(prerender_course_audio(course_iso))
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "translation-server":
+        # python app.py translation-server  (socket: TRANSLATION_SOCKET)
+        run_translation_server()
+        sys.exit(0)
     import uvicorn
     port = int(os.environ.get('PORT', 8000))  # Changed to 8000 to match frontend
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,117 @@
+"""
+Cheap-endpoint latency while the heavy endpoints are saturated.
+
+``--heavy`` clients request uncached TTS audio non-stop (stub engine sleeping
+``--tts-ms`` per synthesis, so each request holds a threadpool thread), while
+``--cheap`` clients fetch GET /practice/{iso}. Each mode runs in a fresh
+interpreter because the limits are read at import:
+
+    off     admission limits so high nothing is queued or shed (the old behaviour)
+    memory  default limits, in-process store
+    shared  default limits, memory-mapped store shared by workers
+
+Every heavy client sends its own X-Forwarded-For address, so the per-client
+token buckets apply per client. The report gives cheap-endpoint p50/p99 and
+how the heavy requests ended (200 / 429 / 503).
+
+Usage (from backend/):
+    python benchmarks/bench_admission.py --heavy 64 --cheap 8 --seconds 10
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+from common import use_scratch_databases, latency_summary
+
+MODES = {
+    "off": {"ADMISSION_STORE": "memory", "TTS_MAX_CONCURRENCY": "100000", "TTS_RATE_PER_MINUTE": "0"},
+    "memory": {"ADMISSION_STORE": "memory"},
+    "shared": {"ADMISSION_STORE": "shared"},
+}
+
+
+async def run(args) -> dict:
+    import httpx
+    import app
+    from fixtures import build_tutor_db
+
+    tutor_db = os.environ["TUTOR_DATABASE_URL"].replace("sqlite:///", "", 1)
+    iso = build_tutor_db(tutor_db, courses=1, cards=2000, skew=0.3)[0]
+    await app.app.router.startup()
+    cheap, heavy = [], Counter()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get(f"/practice/{iso}")  # load the due queue
+        stop = time.perf_counter() + args.seconds
+
+        async def heavy_client(n: int):
+            headers = {"x-forwarded-for": f"10.0.{n // 250}.{n % 250 + 1}"}
+            i = 0
+            while time.perf_counter() < stop:
+                r = await client.get("/practice/tts", params={"text": f"client {n} phrase {i}", "lang": "fr"},
+                                     headers=headers)
+                heavy[r.status_code] += 1
+                i += 1
+                if r.status_code != 200:
+                    await asyncio.sleep(min(float(r.headers.get("retry-after", 1)), 1.0))
+
+        async def cheap_client():
+            await asyncio.sleep(0.5)  # let the heavy load build up
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                r = await client.get(f"/practice/{iso}", params={"limit": 10})
+                cheap.append(time.perf_counter() - t0)
+                assert r.status_code == 200, r.status_code
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(heavy_client(n) for n in range(args.heavy)),
+                             *(cheap_client() for _ in range(args.cheap)))
+    await app.app.router.shutdown()
+    return {"cheap": {"requests": len(cheap), **latency_summary(cheap)},
+            "heavy": dict(sorted(heavy.items())), "admission": app._ADMISSION.stats()["classes"]["tts"]}
+
+
+def child(args):
+    logging.disable(logging.WARNING)
+    use_scratch_databases()
+    print(json.dumps(asyncio.run(run(args))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heavy", type=int, default=64, help="concurrent TTS clients")
+    parser.add_argument("--cheap", type=int, default=8, help="concurrent /practice clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tts-ms", type=float, default=500.0, help="stub synthesis time")
+    parser.add_argument("--modes", default="off,memory,shared")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args)
+    print(f"{args.heavy} TTS clients ({args.tts_ms:.0f} ms per synthesis), {args.cheap} /practice clients, "
+          f"{args.seconds:.0f} s per mode")
+    print(f"{'mode':<8} {'cheap p50':>10} {'cheap p95':>10} {'cheap p99':>10}  heavy statuses")
+    for mode in args.modes.split(","):
+        scratch = tempfile.mkdtemp(prefix="portfolio-bench-")
+        env = {**os.environ, **MODES[mode], "TTS_ENGINE": "stub", "TTS_STUB_DELAY_MS": str(args.tts_ms),
+               "ADMISSION_TRUST_FORWARDED": "1", "ADMISSION_FILE": os.path.join(scratch, "admission.bin")}
+        out = subprocess.run([sys.executable, __file__, "--child", mode, "--heavy", str(args.heavy),
+                              "--cheap", str(args.cheap), "--seconds", str(args.seconds)],
+                             env=env, capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        c = r["cheap"]
+        print(f"{mode:<8} {c['p50_ms']:8.1f}ms {c['p95_ms']:8.1f}ms {c['p99_ms']:8.1f}ms  {r['heavy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure /api/contact latency while the SMTP server is throttled.
+
+Starts the local SMTP stand-in with a per-reply delay, points the outbox at it
+and posts contact messages at fixed concurrency through the in-process ASGI app.
+
+Usage (from backend/):
+    python benchmarks/bench_contact.py --requests 200 --concurrency 20 --smtp-delay 0.5
+"""
+
+from __future__ import annotations
+import os
+import time
+import asyncio
+import argparse
+
+from common import use_scratch_databases, percentile
+
+use_scratch_databases()
+
+from smtp_standin import SMTPStandIn  # noqa: E402
+
+
+async def run(args):
+    import httpx
+    import app
+
+    await app.app.router.startup()
+    latencies = []
+    statuses = {}
+    sem = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post("/api/contact", json={
+                    "name": f"Bench {i}", "email": "bench@example.com", "message": "load test"})
+                latencies.append(time.perf_counter() - t0)
+                statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - t0
+    await app.app.router.shutdown()
+
+    print(f"requests: {args.requests}  concurrency: {args.concurrency}  smtp delay: {args.smtp_delay}s")
+    print(f"statuses: {statuses}")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s")
+    for pct in (50, 95, 99):
+        print(f"p{pct}: {percentile(latencies, pct) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--smtp-delay", type=float, default=0.5)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    args = parser.parse_args()
+
+    SMTPStandIn(port=args.smtp_port, delay=args.smtp_delay).start_in_thread()
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1", "SMTP_PORT": str(args.smtp_port),
+        "SMTP_STARTTLS": "0", "SMTP_AUTH": "0",
+        "SMTP_SENDER": "portfolio@localhost", "RECIPIENT_EMAIL": "owner@localhost",
+    })
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Peak RSS and time-to-first-byte of /course/{iso} for large courses.
+
+Compares the single JSON document with NDJSON streaming. Every
+(size, mode) pair runs in a fresh subprocess so peak RSS is not shared.
+
+Usage (from backend/):
+    python benchmarks/bench_course_export.py --sizes 10000,100000,1000000
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import argparse
+import resource
+import datetime
+import subprocess
+
+from common import use_scratch_databases
+
+scratch = use_scratch_databases()
+
+
+def build_db(path: str, cards: int):
+    from sqlalchemy import create_engine
+    import app
+
+    engine = create_engine(f"sqlite:///{path}")
+    app.TutorBase.metadata.create_all(engine)
+    engine.dispose()
+    today = datetime.date.today().isoformat()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO courses (id, language, iso, level, description) VALUES (1, 'Bench', 'bench', 'A1', '')")
+    batch = []
+    for i in range(cards):
+        batch.append((1, f"front text {i}", f"back text {i}", "", "vocab", 1, 0, 2.5, today))
+        if len(batch) == 50_000:
+            conn.executemany("INSERT INTO cards (course_id, front, back, hint, tag, interval, repetition, efactor,"
+                             " next_review) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO cards (course_id, front, back, hint, tag, interval, repetition, efactor,"
+                         " next_review) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+async def measure(mode: str) -> dict:
+    import app
+
+    # Drive the ASGI app directly: client libraries' in-process transports buffer
+    # the whole body, which would hide both TTFB and streaming memory.
+    query = b"format=ndjson" if mode == "ndjson" else b""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/course/bench", "raw_path": b"/course/bench", "query_string": query,
+             "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    stats = {"ttfb": None, "bytes": 0}
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        # Deliver the (empty) request once, then park until the response is
+        # complete so the streaming response's disconnect listener doesn't spin.
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if stats["ttfb"] is None and message.get("body"):
+                stats["ttfb"] = time.perf_counter() - t0
+            stats["bytes"] += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    await app.app(scope, receive, send)
+    total = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"ttfb_ms": stats["ttfb"] * 1000, "total_ms": total * 1000, "bytes": stats["bytes"],
+            "peak_rss_mb": peak / 1024, "rss_growth_mb": (peak - base_rss) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--modes", default="json,ndjson")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.child[1]))))
+        return
+
+    print(f"{'cards':>9} {'mode':<7} {'TTFB ms':>10} {'total ms':>10} {'MB out':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        path = os.path.join(scratch, f"course_{size}.db")
+        build_db(path, size)
+        for mode in args.modes.split(","):
+            env = {**os.environ, "TUTOR_DATABASE_URL": f"sqlite:///{path}", "DUE_QUEUE_ENABLED": "0"}
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", path, mode],
+                                 env=env, check=True, capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{size:>9} {mode:<7} {r['ttfb_ms']:>10.1f} {r['total_ms']:>10.1f} {r['bytes'] / 1e6:>8.1f} "
+                  f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
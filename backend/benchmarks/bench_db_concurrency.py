@@ -0,0 +1,182 @@
+"""
+Mixed review/practice traffic against the old and new database layers.
+
+old:   default SQLite settings (rollback journal), sync sessions in a thread pool,
+       as the routes ran before db.py
+sync:  db.make_engine (WAL, synchronous=NORMAL, busy timeout, mmap), sync
+       sessions in a thread pool
+async: db.AsyncDatabase (same pragmas) with aiosqlite sessions on the event loop
+
+Usage (from backend/):
+    python benchmarks/bench_db_concurrency.py --cards 5000 --ops 4000 --concurrency 32
+"""
+
+from __future__ import annotations
+import os
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from common import use_scratch_databases, percentile
+
+scratch = use_scratch_databases()
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app  # noqa: E402
+import db  # noqa: E402
+
+
+def build_db(path: str, cards: int):
+    engine = create_engine(f"sqlite:///{path}")
+    app.TutorBase.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    course = app.Course(language="Bench", iso="bench", level="A1", description="")
+    session.add(course)
+    session.flush()
+    today = datetime.date.today()
+    session.add_all(app.Card(course_id=course.id, front=f"f{i}", back=f"b{i}",
+                             next_review=today - datetime.timedelta(days=i % 7)) for i in range(cards))
+    session.commit()
+    session.close()
+    engine.dispose()
+
+
+def sync_review(Session, card_id, quality):
+    session = Session()
+    try:
+        card = session.query(app.Card).filter(app.Card.id == card_id).first()
+        app.sm2_update(card, quality)
+        session.commit()
+    finally:
+        session.close()
+
+
+def sync_practice(Session, limit=10):
+    session = Session()
+    try:
+        return session.query(app.Card).filter(
+            app.Card.course_id == 1, app.Card.next_review <= datetime.date.today()
+        ).order_by(app.Card.next_review).limit(limit).all()
+    finally:
+        session.close()
+
+
+async def async_review(make_session, card_id, quality):
+    async with make_session() as session:
+        card = await session.get(app.Card, card_id)
+        app.sm2_update(card, quality)
+        await session.commit()
+
+
+async def async_practice(make_session, limit=10):
+    async with make_session() as session:
+        result = await session.execute(select(app.Card).where(
+            app.Card.course_id == 1, app.Card.next_review <= datetime.date.today()
+        ).order_by(app.Card.next_review).limit(limit))
+        return result.scalars().all()
+
+
+def plan(args):
+    rng = random.Random(args.seed)
+    return [("review" if rng.random() < args.review_ratio else "practice",
+             rng.randint(1, args.cards), rng.randint(0, 5)) for _ in range(args.ops)]
+
+
+async def run_old(path, ops, concurrency, tuned=False):
+    if tuned:
+        engine = db.make_engine(f"sqlite:///{path}")
+    else:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(concurrency)
+    samples = {"review": [], "practice": []}
+    errors = 0
+
+    async def one(kind, card_id, quality):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                if kind == "review":
+                    await loop.run_in_executor(pool, sync_review, Session, card_id, quality)
+                else:
+                    await loop.run_in_executor(pool, sync_practice, Session)
+            except Exception:
+                errors += 1
+            samples[kind].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(*op) for op in ops))
+    elapsed = time.perf_counter() - t0
+    pool.shutdown()
+    engine.dispose()
+    return elapsed, samples, errors
+
+
+async def run_sync(path, ops, concurrency):
+    return await run_old(path, ops, concurrency, tuned=True)
+
+
+async def run_async(path, ops, concurrency):
+    database = db.AsyncDatabase(f"sqlite:///{path}")
+    sem = asyncio.Semaphore(concurrency)
+    samples = {"review": [], "practice": []}
+    errors = 0
+
+    async def one(kind, card_id, quality):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                if kind == "review":
+                    await async_review(database.session, card_id, quality)
+                else:
+                    await async_practice(database.session)
+            except Exception:
+                errors += 1
+            samples[kind].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(*op) for op in ops))
+    elapsed = time.perf_counter() - t0
+    await database.dispose()
+    return elapsed, samples, errors
+
+
+def report(name, ops, elapsed, samples, errors):
+    print(f"{name:<6}: {len(ops) / elapsed:8.1f} ops/s   errors: {errors}")
+    for kind, values in samples.items():
+        print(f"    {kind:<9} p50 {percentile(values, 50) * 1000:7.2f} ms   "
+              f"p99 {percentile(values, 99) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--ops", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--review-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    template = os.path.join(scratch, "template.db")
+    build_db(template, args.cards)
+    ops = plan(args)
+    for name, runner in (("old", run_old), ("sync", run_sync), ("async", run_async)):
+        path = os.path.join(scratch, f"{name}.db")
+        shutil.copy(template, path)
+        elapsed, samples, errors = asyncio.run(runner(path, ops, args.concurrency))
+        report(name, ops, elapsed, samples, errors)
+
+
+if __name__ == "__main__":
+    main()
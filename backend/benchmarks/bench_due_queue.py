@@ -0,0 +1,120 @@
+"""
+Latency of fetching the next practice cards from a large course.
+
+Compares the /practice query with and without the (course_id, next_review)
+composite index, and the in-process due-queue.
+
+Usage (from backend/):
+    python benchmarks/bench_due_queue.py --cards 100000 --courses 5 --limit 10
+"""
+
+from __future__ import annotations
+import os
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import tempfile
+
+from common import use_scratch_databases
+
+use_scratch_databases()
+
+
+def build_db(path: str, courses: int, cards: int, seed: int = 0):
+    from sqlalchemy import create_engine
+    import app
+
+    engine = create_engine(f"sqlite:///{path}")
+    app.TutorBase.metadata.create_all(engine)
+    engine.dispose()
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO courses (id, language, iso, level, description) VALUES (?, ?, ?, 'A1', '')",
+                     [(i, f"Lang {i}", f"l{i}") for i in range(1, courses + 1)])
+    rows = []
+    for i in range(cards * courses):
+        due = today + datetime.timedelta(days=rng.randint(-30, 120))
+        rows.append((i % courses + 1, f"front {i}", f"back {i}", "", "vocab", 1, 0, 2.5, due.isoformat()))
+    conn.executemany("INSERT INTO cards (course_id, front, back, hint, tag, interval, repetition, efactor, next_review)"
+                     " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def time_it(fn, repeat: int):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100_000, help="cards per course")
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+    import app
+    from due_queue import DueQueue
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_due.db")
+    print(f"building {args.courses} x {args.cards} cards in {path} ...")
+    build_db(path, args.courses, args.cards)
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    today = datetime.date.today()
+    course_id = 1
+
+    def sql_fetch():
+        session = Session()
+        try:
+            cards = session.query(app.Card).filter(
+                app.Card.course_id == course_id, app.Card.next_review <= today
+            ).order_by(app.Card.next_review).limit(args.limit).all()
+            return [{"id": c.id, **app.card_payload(c)} for c in cards]
+        finally:
+            session.close()
+
+    def loader(cid):
+        session = Session()
+        try:
+            rows = session.query(app.Card.id, app.Card.next_review, app.Card.front, app.Card.back,
+                                 app.Card.hint, app.Card.tag).filter(app.Card.course_id == cid).all()
+            return [(r.id, r.next_review, app.card_payload(r)) for r in rows]
+        finally:
+            session.close()
+
+    results = []
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_cards_course_next_review"))
+    results.append(("sql, course_id index", *time_it(sql_fetch, args.repeat)))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_cards_course_next_review ON cards (course_id, next_review)"))
+        conn.execute(text("ANALYZE"))
+    results.append(("sql, composite index", *time_it(sql_fetch, args.repeat)))
+
+    queue = DueQueue(loader, ttl=3600)
+    t0 = time.perf_counter()
+    queue.load(course_id)
+    load_ms = (time.perf_counter() - t0) * 1000
+    results.append(("due-queue", *time_it(lambda: queue.due(course_id, today, args.limit), args.repeat)))
+
+    print(f"{'path':<24} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, p50, p95 in results:
+        print(f"{name:<24} {p50:>10.3f} {p95:>10.3f}")
+    print(f"due-queue initial load: {load_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare per-pair answer grading with the batch paths in grading.py.
+
+- agreement: the pure-Python fallback must give exactly the scores of
+  rapidfuzz's token_sort_ratio on random phrase pairs
+- pairs: N (expected, answer) pairs graded one call at a time (the old
+  grade_similarity loop) vs grading.grade_pairs, with and without rapidfuzz
+- deck: one answer ranked against a whole deck, per-pair loop vs cdist
+
+Usage (from backend/):
+    python benchmarks/bench_grading.py --pairs 20000 --deck 5000
+"""
+
+from __future__ import annotations
+import time
+import random
+import argparse
+
+import common  # noqa: F401  (puts backend/ on sys.path)
+import grading
+
+WORDS = ("je suis le la un une de du bonjour merci beaucoup comment allez vous tres bien "
+         "où est la gare combien ça coûte parlez anglais je ne comprends pas excusez moi").split()
+
+
+def phrase(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+
+
+def typo(rng: random.Random, s: str) -> str:
+    chars = list(s)
+    for _ in range(rng.randint(0, 3)):
+        if chars:
+            chars[rng.randrange(len(chars))] = rng.choice("abcdeéèu ")
+    words = "".join(chars).split()
+    if rng.random() < 0.3:
+        rng.shuffle(words)
+    return ("  " if rng.random() < 0.2 else "") + " ".join(words).title()
+
+
+def legacy_grade(expected: str, answer: str) -> dict:
+    # grade_similarity as it was before the batch API, kept for timing.
+    sim = grading.fuzz.token_sort_ratio(expected.strip().lower(), answer.strip().lower())
+    if sim >= 95:
+        grade = 5
+    elif sim >= 85:
+        grade = 4
+    elif sim >= 70:
+        grade = 3
+    elif sim >= 50:
+        grade = 2
+    elif sim >= 30:
+        grade = 1
+    else:
+        grade = 0
+    return {"similarity": int(sim), "grade": grade}
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=20000)
+    parser.add_argument("--deck", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not grading._HAS_RAPIDFUZZ:
+        raise SystemExit("rapidfuzz is needed for the comparison")
+
+    rng = random.Random(args.seed)
+    expected = [phrase(rng) for _ in range(args.pairs)]
+    answers = [typo(rng, e) if rng.random() < 0.8 else phrase(rng) for e in expected]
+
+    for e, a in zip(expected, answers):
+        ref = grading.fuzz.token_sort_ratio(grading.normalize(e), grading.normalize(a))
+        got = grading.py_ratio(grading.sort_key(e), grading.sort_key(a))
+        if ref != got:
+            raise AssertionError(f"{e!r} vs {a!r}: rapidfuzz {ref} fallback {got}")
+    print(f"agreement: {args.pairs} pairs, fallback == rapidfuzz token_sort_ratio")
+
+    legacy, t_legacy = timed(lambda: [legacy_grade(e, a) for e, a in zip(expected, answers)])
+    batch, t_batch = timed(grading.grade_pairs, expected, answers, workers=args.workers)
+    assert [(r["similarity"], r["grade"]) for r in legacy] == [(r["similarity"], r["grade"]) for r in batch]
+    grading._HAS_RAPIDFUZZ = False
+    pure, t_pure = timed(grading.grade_pairs, expected, answers)
+    grading._HAS_RAPIDFUZZ = True
+    assert pure == batch
+    print(f"pairs ({args.pairs}): per-pair loop {t_legacy:8.1f} ms   batch {t_batch:8.1f} ms   "
+          f"pure-Python batch {t_pure:8.1f} ms")
+
+    deck = [phrase(rng) for _ in range(args.deck)]
+    queries = [typo(rng, rng.choice(deck)) for _ in range(20)]
+    t_loop = t_cdist = t_pure = 0.0
+    for q in queries:
+        _, t = timed(lambda: sorted(range(len(deck)), key=lambda i: -legacy_grade(deck[i], q)["similarity"])[:5])
+        t_loop += t
+        _, t = timed(grading.best_matches, q, deck, 5, workers=args.workers)
+        t_cdist += t
+    grading._HAS_RAPIDFUZZ = False
+    for q in queries:
+        _, t = timed(grading.best_matches, q, deck, 5)
+        t_pure += t
+    grading._HAS_RAPIDFUZZ = True
+    n = len(queries)
+    print(f"deck match ({args.deck} cards, mean of {n}): per-pair loop {t_loop / n:8.2f} ms   "
+          f"cdist {t_cdist / n:8.2f} ms   pure-Python {t_pure / n:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
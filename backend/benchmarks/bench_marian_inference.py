@@ -0,0 +1,105 @@
+"""
+Compare the default MarianMT path with the CPU inference mode
+(int8 dynamic quantisation, pinned threads, limited beams).
+
+Each mode runs in its own subprocess so resident memory is measured in isolation.
+
+Usage (from backend/):
+    python benchmarks/bench_marian_inference.py --pair en-fr --threads 1 --beams 1
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from common import use_scratch_databases
+
+use_scratch_databases()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_mode(args) -> dict:
+    import app
+
+    if args.mode == "optimized":
+        app.configure_marian_inference(quantize=True, threads=args.threads, num_beams=args.beams)
+    src, tgt = args.pair.split("-")
+    phrases = app.STARTER_PHRASES * args.repeat
+
+    t0 = time.perf_counter()
+    if not app.load_marian_model(src, tgt):
+        raise SystemExit(f"Model for {args.pair} is not available")
+    load_s = time.perf_counter() - t0
+
+    latencies = []
+    for phrase in app.STARTER_PHRASES:
+        t0 = time.perf_counter()
+        app.translate_with_marian(phrase, src, tgt)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    t0 = time.perf_counter()
+    outputs = app.translate_batch_with_marian(phrases, src, tgt, args.batch_size)
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "mode": args.mode,
+        "load_s": round(load_s, 3),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "throughput_per_s": round(len(phrases) / batch_s, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "outputs": outputs[:len(app.STARTER_PHRASES)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pair", default="en-fr")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--beams", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mode", choices=["baseline", "optimized"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = {}
+    for mode in ("baseline", "optimized"):
+        cmd = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--pair", args.pair,
+               "--threads", str(args.threads), "--beams", str(args.beams),
+               "--batch-size", str(args.batch_size), "--repeat", str(args.repeat)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    from app import grade_similarity
+
+    base, opt = results["baseline"]["outputs"], results["optimized"]["outputs"]
+    exact = sum(a == b for a, b in zip(base, opt)) / len(base)
+    mean_sim = sum(grade_similarity(a, b)["similarity"] for a, b in zip(base, opt)) / len(base)
+
+    print(f"{'mode':<10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'phrases/s':>10} {'RSS MB':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['load_s']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['throughput_per_s']:>10} {r['rss_mb']:>8}")
+    print(f"agreement: {exact:.0%} exact, mean similarity {mean_sim:.1f}/100")
+    for a, b in zip(base, opt):
+        if a != b:
+            print(f"  baseline:  {a}\n  optimized: {b}")
+
+
+if __name__ == "__main__":
+    main()
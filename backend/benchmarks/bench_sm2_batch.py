@@ -0,0 +1,64 @@
+"""
+Time sm2_update_batch against applying sm2_update card by card.
+
+That the two agree exactly is checked by tests/test_sm2_batch.py.
+
+Usage (from backend/):
+    python benchmarks/bench_sm2_batch.py
+"""
+
+from __future__ import annotations
+import time
+import random
+import argparse
+
+from common import use_scratch_databases
+
+use_scratch_databases()
+
+
+def random_state(rng: random.Random):
+    return {
+        "repetition": rng.choice([0, 0, 1, 2, 3, rng.randint(4, 40)]),
+        "interval": rng.choice([1, 6, rng.randint(1, 4000)]),
+        "efactor": rng.choice([1.3, 2.5, round(rng.uniform(1.3, 3.0), 6), rng.uniform(1.3, 3.0)]),
+    }
+
+
+def scalar(app, states, qualities):
+    out = []
+    for st, q in zip(states, qualities):
+        card = app.Card(**st)
+        app.sm2_update(card, q)
+        out.append((card.repetition, card.interval, card.efactor, card.next_review))
+    return out
+
+
+def batch(app, states, qualities):
+    cols = app.sm2_update_batch([s["repetition"] for s in states], [s["interval"] for s in states],
+                                [s["efactor"] for s in states], qualities)
+    return list(zip(*cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import app
+
+    rng = random.Random(args.seed)
+    for n in (50, 1000, 50_000):
+        states = [random_state(rng) for _ in range(n)]
+        qualities = [rng.randint(0, 5) for _ in range(n)]
+        t0 = time.perf_counter()
+        scalar(app, states, qualities)
+        t_scalar = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        batch(app, states, qualities)
+        t_batch = time.perf_counter() - t0
+        print(f"{n:>6} cards: scalar {t_scalar * 1000:8.2f} ms   batch {t_batch * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Requests/s for the React bundles: a plain StaticFiles mount vs the catch-all
+route backed by static_assets.StaticSite.
+
+The build is copied to a scratch directory and precompressed there, then each
+case fires sequential GETs straight into the ASGI app for ``--seconds``.
+Bytes/request shows what goes over the wire; "revalidate" sends the ETag back
+and gets a 304.
+
+Usage (from backend/):
+    python benchmarks/bench_static.py --seconds 3
+"""
+
+from __future__ import annotations
+import os
+import time
+import shutil
+import asyncio
+import argparse
+
+from common import BACKEND_DIR, use_scratch_databases
+
+scratch = use_scratch_databases()
+SITE = os.path.join(scratch, "static")
+os.environ["STATIC_DIR"] = SITE
+
+CHUNKS = {
+    "main": "/static/js/main.2fc9b986.chunk.js",
+    "vendor": "/static/js/2.8fcb2748.chunk.js",
+}
+
+
+async def get(asgi, path: str, headers: dict):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+             "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    out = {"status": 0, "headers": {}, "bytes": 0}
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+            out["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            out["bytes"] += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await asgi(scope, receive, send)
+    return out
+
+
+async def rate(asgi, path: str, headers: dict, seconds: float):
+    first = await get(asgi, path, headers)
+    n = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        await get(asgi, path, headers)
+        n += 1
+    return n / (time.perf_counter() - t0), first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    shutil.copytree(os.path.join(BACKEND_DIR, "static"), SITE)
+    import static_assets
+    print("precompress:", static_assets.precompress(SITE))
+
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+    import app
+
+    plain = FastAPI()
+    plain.mount("/", StaticFiles(directory=SITE, html=True))
+
+    cases = [
+        ("StaticFiles mount", plain, {"accept-encoding": "gzip, br"}),
+        ("StaticSite identity", app.app, {"accept-encoding": "identity"}),
+        ("StaticSite gzip", app.app, {"accept-encoding": "gzip"}),
+    ]
+    if static_assets._HAS_BROTLI:
+        cases.append(("StaticSite br", app.app, {"accept-encoding": "gzip, br"}))
+
+    async def run():
+        print(f"{'chunk':<7} {'case':<22} {'req/s':>9} {'bytes/req':>10}  cache-control")
+        for chunk, path in CHUNKS.items():
+            for label, asgi, headers in cases:
+                rps, first = await rate(asgi, path, headers, args.seconds)
+                print(f"{chunk:<7} {label:<22} {rps:9.0f} {first['bytes']:10d}  {first['headers'].get('cache-control', '-')}")
+            etag = (await get(app.app, path, {"accept-encoding": "gzip"}))["headers"]["etag"]
+            rps, first = await rate(app.app, path, {"accept-encoding": "gzip", "if-none-match": etag}, args.seconds)
+            print(f"{chunk:<7} {'StaticSite revalidate':<22} {rps:9.0f} {first['bytes']:10d}  -> {first['status']}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Single-sentence translation requests from concurrent clients: one generate()
+call per request in-process vs the shared micro-batching service.
+
+By default the model is a stand-in whose cost is ``--base-ms`` per generate()
+call plus ``--per-sentence-ms`` per sentence, and calls are serialised as they
+are on a CPU-bound model. Pass ``--marian en-fr`` to use the real model via
+app.translate_batch_with_marian (needs torch + transformers).
+
+Usage (from backend/):
+    python benchmarks/bench_translation_server.py --clients 1,8,32 --requests 400
+"""
+
+from __future__ import annotations
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from common import use_scratch_databases, percentile
+
+use_scratch_databases()
+
+from translation_server import TranslationServer, TranslationClient  # noqa: E402
+
+
+def stand_in(base_ms: float, per_sentence_ms: float):
+    lock = threading.Lock()
+    calls = []
+
+    def translate(texts, src, tgt):
+        with lock:
+            calls.append(len(texts))
+            time.sleep((base_ms + per_sentence_ms * len(texts)) / 1000)
+        return [f"[{tgt}] {t}" for t in texts]
+
+    return translate, calls
+
+
+def drive(call, clients: int, requests: int):
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            call(f"sentence number {i % 50}")
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    return requests / wall, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--base-ms", type=float, default=30.0)
+    parser.add_argument("--per-sentence-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--marian", help="src-tgt pair to run with the real model")
+    args = parser.parse_args()
+
+    if args.marian:
+        import app
+        src, tgt = args.marian.split("-")
+        translate = app.translate_batch_with_marian
+        if app.load_marian_model(src, tgt) is None:
+            raise SystemExit(f"no Marian model for {args.marian}")
+        calls = []
+    else:
+        src, tgt = "en", "fr"
+        translate, calls = stand_in(args.base_ms, args.per_sentence_ms)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="portfolio-bench-"), "translate.sock")
+    server = TranslationServer(translate, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    threading.Thread(target=lambda: asyncio.run(server.serve(path)), daemon=True).start()
+    while not os.path.exists(path):
+        time.sleep(0.01)
+    client = TranslationClient(path)
+
+    print(f"{'clients':>7} {'mode':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>10}")
+    for clients in [int(c) for c in args.clients.split(",")]:
+        calls.clear()
+        rps, p50, p99 = drive(lambda text: translate([text], src, tgt), clients, args.requests)
+        print(f"{clients:>7} {'in-process':<10} {rps:8.1f} {p50:8.1f} {p99:8.1f} {1.0:10.2f}")
+        before = (server.batches, server.sentences)
+        rps, p50, p99 = drive(lambda text: client.translate([text], src, tgt), clients, args.requests)
+        batches, sentences = server.batches - before[0], server.sentences - before[1]
+        print(f"{clients:>7} {'service':<10} {rps:8.1f} {p50:8.1f} {p99:8.1f} {sentences / max(1, batches):10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def use_scratch_databases() -> str:
+    """Point the app at throwaway SQLite files unless URLs were given explicitly.
+
+    Must run before ``import app``. Returns the scratch directory.
+    """
+    scratch = tempfile.mkdtemp(prefix="portfolio-bench-")
+    os.environ.setdefault("TUTOR_DATABASE_URL", f"sqlite:///{os.path.join(scratch, 'tutor.db')}")
+    os.environ.setdefault("CONTACT_DATABASE_URL", f"sqlite:///{os.path.join(scratch, 'contact.db')}")
+    os.environ.setdefault("TTS_CACHE_DIR", os.path.join(scratch, "tts_cache"))
+    return scratch
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def latency_summary(latencies) -> dict:
+    """p50/p95/p99 in milliseconds for a list of durations in seconds."""
+    return {f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 3) for pct in (50, 95, 99)}
+
+
+# Metrics where a bigger number is an improvement; everything else is a cost.
+HIGHER_IS_BETTER = ("rps", "ops_per_s")
+# Counts that describe the run rather than measure it.
+NOT_COMPARED = ("requests", "calls")
+
+
+def save_results(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare_results(results: dict, baseline_path: str, tolerance: float, min_samples: int = 50) -> bool:
+    """Print each metric next to the stored baseline; True if any regressed by more than ``tolerance``.
+
+    ``results`` and the baseline map a name (endpoint, function) to a dict of metrics.
+    Entries with fewer than ``min_samples`` requests/calls are shown but never flagged;
+    their tail latencies are noise.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressed = False
+    print(f"\nvs baseline {baseline_path} (tolerance {tolerance:.0%}):")
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"  {name}: not in baseline")
+            continue
+        cells = []
+        for key, value in metrics.items():
+            before = old.get(key)
+            if key in NOT_COMPARED:
+                continue
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before:
+                continue
+            change = (value - before) / before
+            worse = -change if key in HIGHER_IS_BETTER else change
+            flag = ""
+            samples = metrics.get("requests", metrics.get("calls", min_samples))
+            if worse > tolerance and samples >= min_samples:
+                flag = " !"
+                regressed = True
+            cells.append(f"{key} {change:+.0%}{flag}")
+        print(f"  {name:<28} " + "  ".join(cells))
+    return regressed
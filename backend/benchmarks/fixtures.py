@@ -0,0 +1,115 @@
+"""
+Tutor databases of configurable size for the load test and benchmarks.
+
+Each course gets ``cards`` cards. ``skew`` shapes the review history: every
+card's number of past reviews is drawn from a geometric distribution with mean
+``skew / (1 - skew)``, and those reviews are replayed through SM-2 with mostly
+passing grades. At skew 0 every card is new and due today; at 0.9 a few cards
+have long histories and are due months out while most of the deck is fresh, as
+in a real learner's collection.
+
+Usage (from backend/):
+    python benchmarks/fixtures.py /tmp/tutor.db --courses 5 --cards 20000 --skew 0.6
+"""
+
+from __future__ import annotations
+import os
+import random
+import sqlite3
+import argparse
+import datetime
+
+from common import use_scratch_databases
+
+# Grades given in the simulated history, weighted towards "correct with effort".
+QUALITIES = (1, 2, 3, 4, 5)
+QUALITY_WEIGHTS = (1, 1, 3, 4, 2)
+TAGS = ("vocab", "phrase", "grammar")
+
+
+def simulate_history(rng: random.Random, reviews: int, today: datetime.date):
+    """(repetition, interval, efactor, next_review) after ``reviews`` SM-2 reviews."""
+    rep, ivl, ef = 0, 1, 2.5
+    last = today
+    if reviews:
+        last = today - datetime.timedelta(days=rng.randint(0, 60))
+    for q in rng.choices(QUALITIES, QUALITY_WEIGHTS, k=reviews):
+        # Same arithmetic as app.sm2_update
+        if q < 3:
+            rep, ivl = 0, 1
+        else:
+            rep += 1
+            ivl = 1 if rep == 1 else 6 if rep == 2 else int(round(ivl * ef))
+        ef = max(1.3, ef + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)))
+    return rep, ivl, ef, last + datetime.timedelta(days=ivl) if reviews else today
+
+
+def build_tutor_db(path: str, courses: int = 5, cards: int = 2000, skew: float = 0.5,
+                   seed: int = 0) -> list:
+    """Create the tutor schema in ``path`` and fill it. Returns the course isos."""
+    from sqlalchemy import create_engine
+    import app
+
+    if not 0 <= skew < 1:
+        raise ValueError("skew must be in [0, 1)")
+    engine = create_engine(f"sqlite:///{path}")
+    app.TutorBase.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    isos = [f"l{i}" for i in range(1, courses + 1)]
+    conn = sqlite3.connect(path)
+    try:
+        first = conn.execute("SELECT COALESCE(MAX(id), 0) FROM courses").fetchone()[0] + 1
+        conn.executemany("INSERT INTO courses (id, language, iso, level, description) VALUES (?, ?, ?, 'A1', '')",
+                         [(first + i, f"Language {iso}", iso) for i, iso in enumerate(isos)])
+        for i in range(courses):
+            rows = []
+            for n in range(cards):
+                reviews = 0
+                while skew and rng.random() < skew:
+                    reviews += 1
+                rep, ivl, ef, due = simulate_history(rng, reviews, today)
+                rows.append((first + i, f"phrase {n} of course {i + 1}", f"translation {n} ({isos[i]})",
+                             "", TAGS[n % len(TAGS)], ivl, rep, ef, due.isoformat()))
+            conn.executemany(
+                "INSERT INTO cards (course_id, front, back, hint, tag, interval, repetition, efactor, next_review)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return isos
+
+
+def describe(path: str) -> dict:
+    today = datetime.date.today().isoformat()
+    conn = sqlite3.connect(path)
+    try:
+        courses, cards, due = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM courses), COUNT(*), SUM(next_review <= ?) FROM cards", (today,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"courses": courses, "cards": cards, "due_today": due or 0,
+            "size_mb": round(sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)) / 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=2000, help="cards per course")
+    parser.add_argument("--skew", type=float, default=0.5, help="review-history skew in [0, 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        raise SystemExit(f"{args.path} already exists")
+    use_scratch_databases()
+    build_tutor_db(args.path, args.courses, args.cards, args.skew, args.seed)
+    print(describe(args.path))
+
+
+if __name__ == "__main__":
+    main()
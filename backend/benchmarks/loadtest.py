@@ -0,0 +1,184 @@
+"""
+Scripted learner sessions against the in-process ASGI app.
+
+Builds a tutor database with fixtures.build_tutor_db, starts the stand-ins
+from stubs.py and runs ``--users`` virtual learners concurrently until
+``--sessions`` sessions are done. A session is:
+
+    GET  /courses
+    GET  /practice/{iso}                 next due cards
+    POST /review/{card_id}               for each card, random grade
+    GET  /practice/tts                   for some cards (stub TTS)
+    POST /practice/evaluate              for some cards (stub STT)
+    POST /translate                      sometimes (stand-in Marian service)
+    GET  /course/{iso}/stats
+    POST /api/contact                    sometimes (stand-in SMTP)
+
+Per endpoint it reports requests/s, p50/p95/p99 latency and SQL statements per
+request, counted with cursor-execute listeners on the app's engines. Save a run
+with --save and pass it to --baseline later; the exit status is 1 when any
+metric regressed by more than --tolerance.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py --courses 5 --cards 5000 --skew 0.6 --users 16 --sessions 400 --save base.json
+    python benchmarks/loadtest.py --courses 5 --cards 5000 --skew 0.6 --users 16 --sessions 400 --baseline base.json
+"""
+
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import contextvars
+from collections import defaultdict
+
+from common import use_scratch_databases, latency_summary, save_results, compare_results
+
+scratch = use_scratch_databases()
+
+import stubs  # noqa: E402
+from fixtures import build_tutor_db, describe  # noqa: E402
+
+# One mutable counter per in-flight request; the context is copied into the
+# threadpool that runs sync endpoints, so the listeners see the same cell.
+_QUERIES: contextvars.ContextVar = contextvars.ContextVar("loadtest_queries", default=None)
+
+PHRASES = ("Good morning", "Where is the station?", "Thank you very much", "I would like a coffee",
+           "How much does this cost?", "See you tomorrow")
+
+
+def count_queries(*engines):
+    from sqlalchemy import event
+
+    def before_cursor_execute(*_):
+        cell = _QUERIES.get()
+        if cell is not None:
+            cell[0] += 1
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    async def call(self, name: str, request):
+        cell = [0]
+        token = _QUERIES.set(cell)
+        t0 = time.perf_counter()
+        try:
+            response = await request
+        finally:
+            _QUERIES.reset(token)
+        self.latencies[name].append(time.perf_counter() - t0)
+        self.queries[name] += cell[0]
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def results(self, elapsed: float) -> dict:
+        out = {}
+        for name, samples in sorted(self.latencies.items()):
+            out[name] = {"requests": len(samples), "errors": self.errors[name],
+                         "rps": round(len(samples) / elapsed, 1), **latency_summary(samples),
+                         "queries_per_req": round(self.queries[name] / len(samples), 2)}
+        total = [s for samples in self.latencies.values() for s in samples]
+        out["all"] = {"requests": len(total), "errors": sum(self.errors.values()),
+                      "rps": round(len(total) / elapsed, 1), **latency_summary(total),
+                      "queries_per_req": round(sum(self.queries.values()) / max(1, len(total)), 2)}
+        return out
+
+
+async def session(client, rec: Recorder, rng: random.Random, isos, args):
+    r = await rec.call("GET /courses", client.get("/courses"))
+    courses = [c["iso"] for c in r.json()] if r.status_code == 200 else isos
+    iso = rng.choice([c for c in courses if c in isos] or isos)
+    r = await rec.call("GET /practice/{iso}", client.get(f"/practice/{iso}", params={"limit": args.cards_per_session}))
+    cards = r.json() if r.status_code == 200 else []
+    for card in cards:
+        if rng.random() < args.tts_rate:
+            await rec.call("GET /practice/tts", client.get("/practice/tts", params={"text": card["back"], "lang": iso}))
+        if rng.random() < args.evaluate_rate:
+            await rec.call("POST /practice/evaluate", client.post(
+                "/practice/evaluate", params={"expected": card["front"], "lang": "en-US"},
+                files={"file": ("answer.wav", b"RIFF" + bytes(256), "audio/wav")}))
+        await rec.call("POST /review/{card_id}", client.post(f"/review/{card['id']}", json=rng.randint(0, 5)))
+    if rng.random() < args.translate_rate:
+        await rec.call("POST /translate", client.post("/translate", json={
+            "texts": [rng.choice(PHRASES)], "src": "en", "tgt": "fr"}))
+    await rec.call("GET /course/{iso}/stats", client.get(f"/course/{iso}/stats"))
+    if rng.random() < args.contact_rate:
+        await rec.call("POST /api/contact", client.post("/api/contact", json={
+            "name": "Load Test", "email": "learner@example.com", "message": "Great course!"}))
+
+
+async def run(args, isos) -> dict:
+    import httpx
+    import app
+
+    count_queries(app.tutor_engine, app.contact_engine,
+                  app.tutor_async_db.engine.sync_engine, app.contact_async_db.engine.sync_engine)
+    await app.app.router.startup()
+    rec = Recorder()
+    remaining = iter(range(args.sessions))
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def user(n: int):
+            rng = random.Random(args.seed * 1000 + n)
+            while next(remaining, None) is not None:
+                await session(client, rec, rng, isos, args)
+
+        # Warm caches and pools outside the measurement.
+        await session(client, Recorder(), random.Random(args.seed), isos, args)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(args.users)))
+        elapsed = time.perf_counter() - t0
+    await app.app.router.shutdown()
+    return rec.results(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=5000, help="cards per course")
+    parser.add_argument("--skew", type=float, default=0.6, help="review-history skew in [0, 1)")
+    parser.add_argument("--users", type=int, default=16, help="concurrent learners")
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--cards-per-session", type=int, default=10)
+    parser.add_argument("--tts-rate", type=float, default=0.2)
+    parser.add_argument("--evaluate-rate", type=float, default=0.05)
+    parser.add_argument("--translate-rate", type=float, default=0.1)
+    parser.add_argument("--contact-rate", type=float, default=0.05)
+    parser.add_argument("--marian-ms", type=float, default=20.0, help="stand-in model cost per call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results here as a baseline")
+    parser.add_argument("--baseline", help="earlier --save output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression, as a fraction")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stubs.install(scratch, marian_ms=args.marian_ms)
+    tutor_db = os.environ["TUTOR_DATABASE_URL"].replace("sqlite:///", "", 1)
+    isos = build_tutor_db(tutor_db, args.courses, args.cards, args.skew, args.seed)
+    print(f"fixture: {describe(tutor_db)}  skew {args.skew}")
+    print(f"{args.users} learners, {args.sessions} sessions")
+
+    results = asyncio.run(run(args, isos))
+    print(f"\n{'endpoint':<28} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/req':>8}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['requests']:6d} {r['errors']:4d} {r['rps']:8.1f} {r['p50_ms']:8.2f} "
+              f"{r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['queries_per_req']:8.2f}")
+    if args.save:
+        save_results(args.save, results)
+    if args.baseline and compare_results(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Micro-benchmarks for the hot helpers, outside any request handling.
+
+- sm2_update             one card, random grade
+- grade_similarity       typed answer vs expected phrase
+- translate (memory)     phrase already in the translation memory
+- translate (service)    memory miss answered by the stand-in Marian service
+- translate (fallback)   memory miss with no service and no model
+
+Each case runs for ``--seconds``; ops/s and per-call p50/p95/p99 (microseconds)
+are reported. --save / --baseline / --tolerance work as in loadtest.py.
+
+Usage (from backend/):
+    python benchmarks/micro.py --seconds 2 --save micro.json
+    python benchmarks/micro.py --seconds 2 --baseline micro.json
+"""
+
+from __future__ import annotations
+import sys
+import time
+import random
+import itertools
+import argparse
+
+from common import use_scratch_databases, percentile, save_results, compare_results
+
+scratch = use_scratch_databases()
+
+import stubs  # noqa: E402
+
+PAIRS = [
+    ("Where is the restroom?", "where is the restroom"),
+    ("How much does this cost?", "how much this cost"),
+    ("I would like a coffee, please", "I would like coffee please"),
+    ("Good evening", "good morning"),
+    ("I don't understand", "i dont understand"),
+    ("Can you help me?", "Could you help me"),
+]
+
+
+def measure(fn, seconds: float) -> dict:
+    fn()  # warm up
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"calls": len(samples), "ops_per_s": round(len(samples) / sum(samples), 1),
+            **{f"p{pct}_us": round(percentile(samples, pct) * 1e6, 2) for pct in (50, 95, 99)}}
+
+
+def cases(app):
+    rng = random.Random(0)
+    card = app.Card(repetition=0, interval=1, efactor=2.5)
+
+    def sm2():
+        app.sm2_update(card, rng.randint(0, 5))
+
+    pairs = itertools.cycle(PAIRS)
+
+    def grade():
+        app.grade_similarity(*next(pairs))
+
+    app.store_translation_memory({"Good morning": "Bonjour"}, "en", "fr")
+
+    def memory_hit():
+        app.translate("Good morning", "en", "fr")
+
+    # Fresh text every call, so each one misses the memory.
+    counter = itertools.count()
+
+    def service_miss():
+        app.translate(f"sentence {next(counter)}", "en", "fr")
+
+    def fallback():
+        app.translate(f"sentence {next(counter)}", "en", "xx")
+
+    return [("sm2_update", sm2), ("grade_similarity", grade), ("translate (memory)", memory_hit),
+            ("translate (service)", service_miss), ("translate (fallback)", fallback)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="per case")
+    parser.add_argument("--marian-ms", type=float, default=20.0, help="stand-in model cost per call")
+    parser.add_argument("--only", help="comma-separated case names")
+    parser.add_argument("--save", help="write the results here as a baseline")
+    parser.add_argument("--baseline", help="earlier --save output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression, as a fraction")
+    args = parser.parse_args()
+
+    stubs.install(scratch, marian_ms=args.marian_ms)
+    import app
+
+    results = {}
+    print(f"{'case':<22} {'calls':>8} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for name, fn in cases(app):
+        if args.only and name not in args.only.split(","):
+            continue
+        if name == "translate (fallback)":
+            # No service and no model: the placeholder path.
+            path, app._TRANSLATION_CLIENT.path = app._TRANSLATION_CLIENT.path, ""
+            has_marian, app._HAS_MARIAN = app._HAS_MARIAN, False
+            try:
+                r = measure(fn, args.seconds)
+            finally:
+                app._TRANSLATION_CLIENT.path, app._HAS_MARIAN = path, has_marian
+        else:
+            r = measure(fn, args.seconds)
+        results[name] = r
+        print(f"{name:<22} {r['calls']:8d} {r['ops_per_s']:10.1f} {r['p50_us']:9.1f} {r['p95_us']:9.1f} {r['p99_us']:9.1f}")
+    if args.save:
+        save_results(args.save, results)
+    if args.baseline and compare_results(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
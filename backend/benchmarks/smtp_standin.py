@@ -0,0 +1,77 @@
+"""
+Minimal local SMTP server for exercising the contact outbox without a real mail host.
+
+It accepts every message, optionally sleeping before each reply to simulate a
+slow or throttled server, and counts delivered messages.
+
+Usage (from backend/):
+    python benchmarks/smtp_standin.py --port 2525 --delay 0.5
+then run the app with SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=0 SMTP_AUTH=0
+"""
+
+from __future__ import annotations
+import asyncio
+import argparse
+import threading
+
+
+class SMTPStandIn:
+    def __init__(self, host: str = "127.0.0.1", port: int = 2525, delay: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.delivered = 0
+        self.connections = 0
+
+    async def _reply(self, writer, line: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        writer.write((line + "\r\n").encode())
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        await self._reply(writer, "220 standin ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                cmd = line.decode(errors="replace").strip().upper()
+                if cmd.startswith("EHLO"):
+                    await self._reply(writer, "250-standin\r\n250 8BITMIME")
+                elif cmd.startswith("HELO"):
+                    await self._reply(writer, "250 standin")
+                elif cmd == "DATA":
+                    await self._reply(writer, "354 end with <CRLF>.<CRLF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.delivered += 1
+                    await self._reply(writer, "250 queued")
+                elif cmd == "QUIT":
+                    await self._reply(writer, "221 bye")
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    await self._reply(writer, "250 ok")
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve()), daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each reply")
+    args = parser.parse_args()
+    asyncio.run(SMTPStandIn(args.host, args.port, args.delay).serve())
@@ -0,0 +1,187 @@
+"""
+Cold-start profile: how long `import app` takes and what each worker costs.
+
+- import: a fresh interpreter imports app; reports wall time, RSS and which
+  optional heavy modules were imported eagerly (should be none)
+- optional: then imports each optional dependency, i.e. the cost a worker
+  pays on first translate / TTS / STT / grading request
+- workers: N workers the way gunicorn would start them, per worker RSS,
+  PSS (shared pages split between the processes) and private memory
+    spawn    each worker imports app itself (no --preload)
+    preload  one master imports app (and, with MARIAN_PRELOAD=1, the
+             MARIAN_WARMUP models) and forks the workers
+
+Save a run with --json and pass it back with --compare to spot regressions.
+
+Usage (from backend/):
+    python benchmarks/startup_profile.py --workers 4 --json startup.json
+    MARIAN_PRELOAD=1 MARIAN_WARMUP=en-fr python benchmarks/startup_profile.py --compare startup.json
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from common import use_scratch_databases
+
+use_scratch_databases()
+
+OPTIONAL = ("numpy", "rapidfuzz", "gtts", "speech_recognition", "torch", "transformers")
+
+
+def memory() -> dict:
+    """RSS/PSS/private memory of this process in MB (Linux smaps_rollup)."""
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    out[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        import resource
+        return {"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return {"rss_mb": out.get("Rss", 0), "pss_mb": out.get("Pss", 0),
+            "private_mb": out.get("Private_Clean", 0) + out.get("Private_Dirty", 0)}
+
+
+def child_import():
+    t0 = time.perf_counter()
+    import app
+    import_s = time.perf_counter() - t0
+    report = {"import_s": import_s, **memory(),
+              "eager_optional": sorted(m for m in OPTIONAL if m in sys.modules)}
+    optional = {}
+    for name in OPTIONAL:
+        if name in sys.modules or not app.available(name):
+            continue
+        t0 = time.perf_counter()
+        try:
+            __import__(name)
+            optional[name] = time.perf_counter() - t0
+        except Exception as e:
+            optional[name] = f"failed: {e}"
+    report["optional_import_s"] = optional
+    report["after_optional"] = memory()
+    print(json.dumps(report))
+
+
+def child_worker():
+    # Spawned worker: import, report ready, wait until every worker is up, measure.
+    import app  # noqa: F401
+    print("ready", flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memory()), flush=True)
+    sys.stdin.read()
+
+
+def run_spawn(n: int):
+    procs = [subprocess.Popen([sys.executable, __file__, "--child", "worker"], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True) for _ in range(n)]
+    for p in procs:
+        assert p.stdout.readline().strip() == "ready"
+    for p in procs:
+        p.stdin.write("go\n")
+        p.stdin.flush()
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return None, results
+
+
+def child_preload(n: int):
+    import app
+    master = memory()
+    go_r, go_w = os.pipe()
+    exit_r, exit_w = os.pipe()
+    res_r, res_w = os.pipe()
+    pids = []
+    for _ in range(n):
+        pid = os.fork()
+        if pid == 0:
+            os.close(go_w)
+            os.read(go_r, 1)
+            line = json.dumps({**memory(), "torch_loaded": app.lazy_imports.is_loaded(app.torch)}) + "\n"
+            os.write(res_w, line.encode())
+            os.read(exit_r, 1)  # stay alive until the master has every result
+            os._exit(0)
+        pids.append(pid)
+    os.write(go_w, b"x" * n)
+    results = []
+    with os.fdopen(res_r) as f:
+        os.close(res_w)
+        while len(results) < n:
+            results.append(json.loads(f.readline()))
+    os.write(exit_w, b"x" * n)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    print(json.dumps({"master": master, "workers": results}))
+
+
+def run_preload(n: int):
+    out = subprocess.run([sys.executable, __file__, "--child", "preload", "--workers", str(n)],
+                         capture_output=True, text=True, check=True)
+    data = json.loads(out.stdout.strip().splitlines()[-1])
+    return data["master"], data["workers"]
+
+
+def summarise(workers):
+    keys = workers[0].keys() if workers else ()
+    return {k: sum(w[k] for w in workers) / len(workers) for k in keys
+            if isinstance(workers[0][k], (int, float)) and not isinstance(workers[0][k], bool)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--compare", help="earlier --json output to diff against")
+    parser.add_argument("--child", choices=["import", "worker", "preload"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "import":
+        return child_import()
+    if args.child == "worker":
+        return child_worker()
+    if args.child == "preload":
+        return child_preload(args.workers)
+
+    out = subprocess.run([sys.executable, __file__, "--child", "import"], capture_output=True, text=True, check=True)
+    report = {"import": json.loads(out.stdout.strip().splitlines()[-1]), "workers": {}}
+    imp = report["import"]
+    print(f"import app: {imp['import_s'] * 1000:.0f} ms, RSS {imp['rss_mb']:.1f} MB, "
+          f"eager optional modules: {imp['eager_optional'] or 'none'}")
+    for name, t in imp["optional_import_s"].items():
+        print(f"  first use of {name:<20} {t * 1000:8.0f} ms" if isinstance(t, float) else f"  {name}: {t}")
+    print(f"  RSS with every optional module: {imp['after_optional']['rss_mb']:.1f} MB")
+
+    for mode, run in (("spawn", run_spawn), ("preload", run_preload)):
+        master, workers = run(args.workers)
+        avg = summarise(workers)
+        report["workers"][mode] = {"master": master, "per_worker": workers, "mean": avg}
+        line = "  ".join(f"{k} {v:7.1f}" for k, v in avg.items())
+        extra = f"   (master RSS {master['rss_mb']:.1f} MB)" if master else ""
+        print(f"{mode:<8} x{args.workers}: mean per worker {line}{extra}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        d = report["import"]["import_s"] - base["import"]["import_s"]
+        print(f"vs {args.compare}: import {d * 1000:+.0f} ms")
+        for mode, data in report["workers"].items():
+            if mode in base.get("workers", {}):
+                old = base["workers"][mode]["mean"]
+                diffs = "  ".join(f"{k} {v - old.get(k, 0):+7.1f}" for k, v in data["mean"].items())
+                print(f"  {mode:<8} {diffs}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
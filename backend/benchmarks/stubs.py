@@ -0,0 +1,66 @@
+"""
+Offline stand-ins for the app's external dependencies, for load tests.
+
+``install()`` must run before ``import app``:
+
+- SMTP: smtp_standin.SMTPStandIn on a free local port
+- gTTS / speech recognition: the app's own stub engines (TTS_ENGINE=stub, STT_ENGINE=stub)
+- Marian: a TranslationServer on a scratch socket whose "model" costs
+  ``marian_ms`` per generate() call plus ``per_sentence_ms`` per sentence
+
+Nothing here reaches the network, so results only reflect the app itself.
+"""
+
+from __future__ import annotations
+import os
+import time
+import socket
+import asyncio
+import threading
+
+from smtp_standin import SMTPStandIn
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stand_in_marian(marian_ms: float, per_sentence_ms: float):
+    lock = threading.Lock()
+
+    def translate_batch(texts, src, tgt):
+        with lock:  # one model, calls are serialised like CPU-bound inference
+            time.sleep((marian_ms + per_sentence_ms * len(texts)) / 1000)
+        return [f"<{src}-{tgt}> {t}" for t in texts]
+
+    return translate_batch
+
+
+def install(scratch: str, marian_ms: float = 20.0, per_sentence_ms: float = 2.0, smtp_delay: float = 0.0,
+            stt_transcript: str = "hello", stt_delay_ms: float = 0.0) -> dict:
+    """Start the stand-ins and point the app's environment at them. Returns what was started."""
+    from translation_server import TranslationServer
+
+    smtp = SMTPStandIn(port=free_port(), delay=smtp_delay)
+    smtp.start_in_thread()
+
+    sock = os.path.join(scratch, "translate.sock")
+    translator = TranslationServer(stand_in_marian(marian_ms, per_sentence_ms))
+    threading.Thread(target=lambda: asyncio.run(translator.serve(sock)), daemon=True).start()
+    while not os.path.exists(sock):
+        time.sleep(0.01)
+
+    os.environ.update({
+        "SMTP_SERVER": smtp.host, "SMTP_PORT": str(smtp.port),
+        "SMTP_STARTTLS": "0", "SMTP_AUTH": "0",
+        "SMTP_SENDER": "portfolio@localhost", "RECIPIENT_EMAIL": "owner@localhost",
+        "TTS_ENGINE": "stub",
+        "STT_ENGINE": "stub", "STT_STUB_TRANSCRIPT": stt_transcript, "STT_STUB_DELAY_MS": str(stt_delay_ms),
+        "TRANSLATION_SOCKET": sock,
+        # The stand-in service answers every pair, so no worker loads a real model.
+        "MARIAN_WARMUP": "",
+        "MARIAN_PRELOAD": "0",
+    })
+    return {"smtp": smtp, "translator": translator}
@@ -0,0 +1,207 @@
+"""
+Incremental parsers for bulk card import.
+
+Uploads are consumed chunk by chunk; each parser yields
+``(line_number, card_dict_or_None, error_or_None)`` so a bad row is reported
+without aborting the rest of the import.
+
+Supported formats:
+- ``csv``: optional header naming front/back/hint/tag, otherwise positional
+- ``ndjson``: one JSON object per line with front/back/hint/tag keys
+- ``anki``: Anki "Notes in Plain Text" export, tab separated front, back and tags,
+  with ``#key:value`` header directives
+"""
+
+from __future__ import annotations
+import csv
+import json
+import codecs
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+CARD_FIELDS = ("front", "back", "hint", "tag")
+FORMATS = ("csv", "ndjson", "anki")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/tab-separated-values": "anki",
+}
+
+Record = Tuple[int, Optional[Dict], Optional[str]]
+
+# A quoted field may span at most this many lines; past that the opening quote
+# is reported as an error instead of buffering the rest of the upload.
+MAX_RECORD_LINES = 64
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _text(values: Dict, field: str) -> str:
+    value = values.get(field)
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"{field} must be a string")
+
+
+def _card(values: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    try:
+        front, back, hint, tag = (_text(values, f) for f in CARD_FIELDS)
+    except ValueError as e:
+        return None, str(e)
+    if not front or not back:
+        return None, "front and back are required"
+    return {"front": front, "back": back, "hint": hint, "tag": tag or "imported"}, None
+
+
+def _ends_in_quotes(line: str, in_quotes: bool, delimiter: str) -> bool:
+    """Whether a quoted field is still open at the end of ``line``.
+
+    Follows the csv module: a quote only opens a field when it is the field's
+    first character, anywhere else it is a literal, and ``""`` inside a quoted
+    field is an escaped quote.
+    """
+    field_start = not in_quotes
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if in_quotes:
+            if ch == '"':
+                if i + 1 < n and line[i + 1] == '"':
+                    i += 1
+                else:
+                    in_quotes = False
+        elif ch == delimiter:
+            field_start = True
+            i += 1
+            continue
+        elif ch == '"' and field_start:
+            in_quotes = True
+        field_start = False
+        i += 1
+    return in_quotes
+
+
+async def _quoted_records(lines: AsyncIterator[str], delimiter: Callable[[], str] = lambda: ","
+                          ) -> AsyncIterator[Tuple[int, Optional[str], Optional[str]]]:
+    """Join physical lines into ``(line_number, record, error)``, keeping newlines inside quoted fields.
+
+    A quoted field still open after MAX_RECORD_LINES lines yields an error for
+    the line that opened it; the lines after that are read again as records.
+    """
+    record: List[Tuple[int, str]] = []
+    todo: deque = deque()
+    in_quotes = False
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        todo.append((line_no, line))
+        while todo:
+            record.append(todo.popleft())
+            in_quotes = _ends_in_quotes(record[-1][1], in_quotes, delimiter())
+            if not in_quotes:
+                yield record[0][0], "\n".join(text for _, text in record), None
+                record = []
+            elif len(record) > MAX_RECORD_LINES:
+                yield record[0][0], None, f"unterminated quoted field (no closing quote within {MAX_RECORD_LINES} lines)"
+                todo.extendleft(reversed(record[1:]))
+                record = []
+                in_quotes = False
+    if record:
+        yield record[0][0], "\n".join(text for _, text in record), None
+
+
+async def parse_csv(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    first = True
+    async for line_no, record, error in _quoted_records(lines):
+        if error:
+            yield line_no, None, error
+            continue
+        if not record.strip():
+            continue
+        try:
+            row = next(csv.reader([record]))
+        except csv.Error as e:
+            yield line_no, None, f"malformed CSV: {e}"
+            continue
+        if first:
+            first = False
+            names = [c.strip().lower() for c in row]
+            if "front" in names and "back" in names:
+                header = names
+                continue
+        values = dict(zip(header, row)) if header else dict(zip(CARD_FIELDS, row))
+        card, error = _card(values)
+        yield line_no, card, error
+
+
+async def parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(values, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        card, error = _card(values)
+        yield line_no, card, error
+
+
+async def parse_anki(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    separator = "\t"
+    async for line_no, record, error in _quoted_records(lines, lambda: separator):
+        if error:
+            yield line_no, None, error
+            continue
+        if record.startswith("#"):
+            key, _, value = record[1:].partition(":")
+            if key.strip().lower() == "separator":
+                value = value.strip().lower()
+                separator = {"tab": "\t", "comma": ",", "semicolon": ";", "space": " ", "pipe": "|"}.get(value, value[:1] or "\t")
+            continue
+        if not record.strip():
+            continue
+        try:
+            row = next(csv.reader([record], delimiter=separator))
+        except csv.Error as e:
+            yield line_no, None, f"malformed row: {e}"
+            continue
+        values = {"front": row[0] if row else "", "back": row[1] if len(row) > 1 else "",
+                  "tag": row[2] if len(row) > 2 else ""}
+        card, error = _card(values)
+        yield line_no, card, error
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson, "anki": parse_anki}
+
+
+def parse(fmt: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    return PARSERS[fmt](iter_lines(chunks))
@@ -0,0 +1,134 @@
+"""
+Database layer shared by the contact and tutor stores.
+
+Engine URLs come from the environment (CONTACT_DATABASE_URL, TUTOR_DATABASE_URL)
+and default to SQLite files next to this module. SQLite connections are tuned
+for concurrent web traffic: WAL journaling, synchronous=NORMAL, a busy timeout
+and memory-mapped reads. Async engines (aiosqlite, or asyncpg for Postgres)
+are created on first use so the sync paths work without the async drivers.
+
+Sync routes keep using the thread-pooled sync engine: on SQLite it sustains
+more mixed traffic than aiosqlite (see benchmarks/bench_db_concurrency.py).
+Async routes use the async session so they never block the event loop.
+"""
+
+from __future__ import annotations
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CONTACT_DATABASE_URL = os.environ.get(
+    "CONTACT_DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'contact_messages.db')}")
+TUTOR_DATABASE_URL = os.environ.get(
+    "TUTOR_DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'teach_me_ai.db')}")
+
+SQLITE_WAL = os.environ.get("SQLITE_WAL", "1") == "1"
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", 256))
+
+# sync driver -> async driver
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _record):
+    cursor = dbapi_conn.cursor()
+    try:
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    finally:
+        cursor.close()
+
+
+def make_engine(url: str, **kwargs) -> Engine:
+    if is_sqlite(url):
+        kwargs.setdefault("connect_args", {"check_same_thread": False})
+        engine = create_engine(url, **kwargs)
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+        return engine
+    kwargs.setdefault("pool_pre_ping", True)
+    return create_engine(url, **kwargs)
+
+
+def make_sessionmaker(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername!r}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def make_async_engine(url: str, **kwargs):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    if is_sqlite(url):
+        # aiosqlite defaults to NullPool, which opens a connection (and thread) per session.
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+    engine = create_async_engine(async_url(url), **kwargs)
+    if is_sqlite(url):
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def make_async_sessionmaker(engine):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # Objects stay readable after commit without an implicit (sync) refresh.
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+class AsyncDatabase:
+    """Lazily created async engine/sessionmaker for one database URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._engine = None
+        self._sessionmaker = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = make_async_engine(self.url)
+        return self._engine
+
+    def session(self):
+        if self._sessionmaker is None:
+            self._sessionmaker = make_async_sessionmaker(self.engine)
+        return self._sessionmaker()
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._sessionmaker = None
+
+
+def describe(engine: Engine) -> Dict[str, Optional[str]]:
+    """Effective settings of an engine, for diagnostics."""
+    info: Dict[str, Optional[str]] = {"url": engine.url.render_as_string(hide_password=True)}
+    if engine.url.get_backend_name() == "sqlite":
+        with engine.connect() as conn:
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size"):
+                info[pragma] = str(conn.exec_driver_sql(f"PRAGMA {pragma}").scalar())
+    return info
@@ -0,0 +1,178 @@
+"""
+In-process due-queue for practice sessions.
+
+Each course keeps a min-heap of (next_review, card_id) plus the card payloads,
+so the next ``limit`` due cards are found in O(limit log n). Updates push a
+fresh heap entry and leave the old one behind; stale entries are skipped when
+popped and compacted away once they outnumber live ones.
+
+Writes from other processes are not visible here. With a ``version``
+function (the shared per-course counters the response cache uses), a course's
+queue is reloaded as soon as its version moves past what this process has
+seen; ``update`` takes the version the caller's own write produced so local
+reviews keep the queue warm. Either way the queue is reloaded after ``ttl``
+seconds.
+
+Loading a large course takes seconds, so it never happens inside ``due``:
+a missing or stale course makes ``due`` return None (the caller answers from
+the database) and starts a rebuild in a background thread, at most once per
+``reload_interval`` seconds per course.
+"""
+
+from __future__ import annotations
+import time
+import heapq
+import logging
+import datetime
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# loader(course_id) -> iterable of (card_id, next_review, payload)
+Loader = Callable[[int], Iterable[Tuple[int, datetime.date, Dict]]]
+# version(course_id) -> counter bumped after every committed write to the course
+Version = Callable[[int], int]
+
+
+class _CourseQueue:
+    __slots__ = ("heap", "cards", "loaded_at", "version")
+
+    def __init__(self, rows: Iterable[Tuple[int, datetime.date, Dict]], version: Optional[int] = None):
+        self.cards: Dict[int, Tuple[datetime.date, Dict]] = {}
+        for card_id, next_review, payload in rows:
+            self.cards[card_id] = (next_review, payload)
+        self.heap = [(nr, cid) for cid, (nr, _) in self.cards.items()]
+        heapq.heapify(self.heap)
+        self.loaded_at = time.monotonic()
+        self.version = version
+
+    def push(self, card_id: int, next_review: datetime.date, payload: Optional[Dict] = None):
+        if payload is None:
+            payload = self.cards[card_id][1]
+        self.cards[card_id] = (next_review, payload)
+        heapq.heappush(self.heap, (next_review, card_id))
+        if len(self.heap) > 2 * len(self.cards) + 64:
+            self.heap = [(nr, cid) for cid, (nr, _) in self.cards.items()]
+            heapq.heapify(self.heap)
+
+    def due(self, today: datetime.date, limit: int) -> List[Dict]:
+        taken: List[Tuple[datetime.date, int]] = []
+        result: List[Dict] = []
+        while self.heap and len(result) < limit and self.heap[0][0] <= today:
+            next_review, card_id = heapq.heappop(self.heap)
+            current = self.cards.get(card_id)
+            if current is None or current[0] != next_review:
+                continue  # stale entry
+            if taken and taken[-1] == (next_review, card_id):
+                continue  # duplicate entry for an unchanged date
+            taken.append((next_review, card_id))
+            result.append({"id": card_id, **current[1]})
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return result
+
+
+class DueQueue:
+    def __init__(self, loader: Loader, ttl: float = 30.0, version: Optional[Version] = None,
+                 reload_interval: float = 10.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.version = version
+        self.reload_interval = reload_interval
+        self._courses: Dict[int, _CourseQueue] = {}
+        self._lock = threading.Lock()
+        self._load_started: Dict[int, float] = {}
+        # Courses being loaded, with the updates that arrived meanwhile (replayed onto the new queue).
+        self._pending: Dict[int, List[Tuple[int, datetime.date, Optional[Dict]]]] = {}
+        # Courses invalidated while loading; their load may predate the write.
+        self._discard: Set[int] = set()
+
+    def _fresh(self, course_id: int) -> Optional[_CourseQueue]:
+        """The course's queue if it can be served as is. Call with ``_lock`` held."""
+        queue = self._courses.get(course_id)
+        if queue is None or time.monotonic() - queue.loaded_at > self.ttl:
+            return None
+        if self.version is not None and self.version(course_id) != queue.version:
+            return None
+        return queue
+
+    def load(self, course_id: int) -> _CourseQueue:
+        """Build a course's queue from the loader and install it (blocking)."""
+        with self._lock:
+            self._pending.setdefault(course_id, [])
+            self._discard.discard(course_id)
+        try:
+            # Read the version first: a write that lands during the load moves
+            # it on again and triggers another reload.
+            version = self.version(course_id) if self.version is not None else None
+            queue = _CourseQueue(self.loader(course_id), version)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(course_id, None)
+            raise
+        with self._lock:
+            for card_id, next_review, payload in self._pending.pop(course_id, ()):
+                if payload is not None or card_id in queue.cards:
+                    queue.push(card_id, next_review, payload)
+            if course_id not in self._discard:
+                self._courses[course_id] = queue
+            self._discard.discard(course_id)
+        return queue
+
+    def _reload_in_background(self, course_id: int):
+        """Start a background load unless one is running or started recently. Call with ``_lock`` held."""
+        now = time.monotonic()
+        started = self._load_started.get(course_id)
+        if course_id in self._pending or (started is not None and now - started < self.reload_interval):
+            return
+        self._load_started[course_id] = now
+        self._pending[course_id] = []
+
+        def run():
+            try:
+                self.load(course_id)
+            except Exception as e:
+                logger.warning(f"Due-queue load for course {course_id} failed: {e}")
+
+        threading.Thread(target=run, name=f"due-queue-{course_id}", daemon=True).start()
+
+    def due(self, course_id: int, today: datetime.date, limit: int) -> Optional[List[Dict]]:
+        """The next ``limit`` due cards, or None if the course is not loaded and current yet."""
+        with self._lock:
+            queue = self._fresh(course_id)
+            if queue is not None:
+                return queue.due(today, limit)
+            self._reload_in_background(course_id)
+        return None
+
+    def update(self, course_id: int, card_id: int, next_review: datetime.date, payload: Optional[Dict] = None,
+               version: Optional[int] = None):
+        """Record a card's new due date (or a new card when ``payload`` is given).
+
+        ``version`` is the course version after this write's bump; the queue
+        stays current only if no other process bumped it since the last load.
+        """
+        with self._lock:
+            pending = self._pending.get(course_id)
+            if pending is not None:
+                pending.append((card_id, next_review, payload))
+            queue = self._courses.get(course_id)
+            if queue is None:
+                return  # loaded fresh on next access
+            if payload is None and card_id not in queue.cards:
+                self._courses.pop(course_id, None)
+                return
+            queue.push(card_id, next_review, payload)
+            if version is not None and queue.version is not None and queue.version + 1 == version:
+                queue.version = version
+
+    def invalidate(self, course_id: Optional[int] = None):
+        with self._lock:
+            if course_id is None:
+                self._courses.clear()
+                self._discard.update(self._pending)
+            else:
+                self._courses.pop(course_id, None)
+                if course_id in self._pending:
+                    self._discard.add(course_id)
@@ -0,0 +1,133 @@
+"""
+Answer grading: token-sort similarity mapped to 0-5 grade bands.
+
+Inputs are normalised once per batch. With rapidfuzz installed, scoring runs
+in C: ``process.cdist`` ranks a deck against one answer and ``process.cpdist``
+(where the installed rapidfuzz has it) scores N pairs, spread over ``workers``
+threads. Without it, strings are token-sorted up front and a bit-parallel LCS
+in pure Python gives the same scores, so grades never depend on which optional
+packages are present.
+"""
+
+from __future__ import annotations
+import re
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lazy_imports import available, lazy
+
+fuzz = lazy("rapidfuzz.fuzz")
+process = lazy("rapidfuzz.process")
+np = lazy("numpy")
+_HAS_RAPIDFUZZ = available("rapidfuzz")
+_HAS_NUMPY = available("numpy")
+
+# Lower similarity bound of grades 1..5; anything below the first is grade 0.
+GRADE_THRESHOLDS = (30, 50, 70, 85, 95)
+FEEDBACK = (
+    "Far off — study the pattern.",
+    "Needs work — try again.",
+    "Needs work — try again.",
+    "Good — minor issues.",
+    "Perfect!",
+    "Perfect!",
+)
+
+
+# rapidfuzz splits tokens on the same whitespace as str.split(), except that
+# in strings with no character above U+00FF it does not count U+0085 and
+# U+00A0 (no-break space, common in French text).
+_LATIN1_SEPARATOR = re.compile(r"[^\S\x85\xa0]+")
+
+
+def normalize(s: str) -> str:
+    return s.strip().lower()
+
+
+def sort_key(s: str) -> str:
+    """Normalised, token-sorted form of ``s``; py_ratio() on keys is token_sort_ratio."""
+    s = normalize(s)
+    tokens = _LATIN1_SEPARATOR.split(s) if s.isascii() or max(s) <= "\xff" else s.split()
+    return " ".join(sorted(t for t in tokens if t))
+
+
+def _lcs_length(a: str, b: str) -> int:
+    # Hyyrö's bit-parallel LCS: one big-int update per character of b.
+    if not a or not b:
+        return 0
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for ch in b:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def py_ratio(a: str, b: str) -> float:
+    """Indel similarity in [0, 100], computed the way rapidfuzz's fuzz.ratio does."""
+    total = len(a) + len(b)
+    if not total:
+        return 100.0
+    dist = total - 2 * _lcs_length(a, b)
+    return (1.0 - dist / total) * 100
+
+
+def token_sort_ratio(a: str, b: str) -> float:
+    """Similarity of two answers after normalising both."""
+    if _HAS_RAPIDFUZZ:
+        return fuzz.token_sort_ratio(normalize(a), normalize(b))
+    return py_ratio(sort_key(a), sort_key(b))
+
+
+def grade_for(similarity: float) -> int:
+    return bisect.bisect_right(GRADE_THRESHOLDS, similarity)
+
+
+def grade_bands(similarities) -> List[int]:
+    """Map a sequence or array of similarities to grades in one step."""
+    if _HAS_NUMPY:
+        return np.searchsorted(GRADE_THRESHOLDS, np.asarray(similarities, dtype=np.float64), side="right").tolist()
+    return [grade_for(s) for s in similarities]
+
+
+def grade_result(similarity: float, grade: Optional[int] = None) -> Dict:
+    grade = grade_for(similarity) if grade is None else grade
+    return {"similarity": int(similarity), "grade": grade, "feedback": FEEDBACK[grade]}
+
+
+def pairwise_similarity(expected: Sequence[str], answers: Sequence[str], workers: int = 1) -> List[float]:
+    """token_sort_ratio of expected[i] against answers[i] for every i."""
+    if len(expected) != len(answers):
+        raise ValueError("expected and answers must have the same length")
+    if not _HAS_RAPIDFUZZ:
+        return [py_ratio(sort_key(e), sort_key(a)) for e, a in zip(expected, answers)]
+    e_norm = [normalize(s) for s in expected]
+    a_norm = [normalize(s) for s in answers]
+    if _HAS_NUMPY and hasattr(process, "cpdist"):
+        return process.cpdist(e_norm, a_norm, scorer=fuzz.token_sort_ratio, dtype=np.float64,
+                              workers=workers).tolist()
+    return [fuzz.token_sort_ratio(e, a) for e, a in zip(e_norm, a_norm)]
+
+
+def grade_pairs(expected: Sequence[str], answers: Sequence[str], workers: int = 1) -> List[Dict]:
+    sims = pairwise_similarity(expected, answers, workers)
+    return [grade_result(s, g) for s, g in zip(sims, grade_bands(sims))]
+
+
+def best_matches(answer: str, choices: Sequence[str], limit: int = 5, workers: int = 1) -> List[Tuple[int, float]]:
+    """Indices and similarities of the ``limit`` choices closest to ``answer``, best first."""
+    if not choices or limit <= 0:
+        return []
+    if _HAS_RAPIDFUZZ and _HAS_NUMPY:
+        row = process.cdist([normalize(answer)], [normalize(c) for c in choices], scorer=fuzz.token_sort_ratio,
+                            dtype=np.float64, workers=workers)[0]
+        # Stable: higher score first, ties keep deck order, as in the fallback below.
+        top = np.argsort(-row, kind="stable")[:limit]
+        return [(int(i), float(row[i])) for i in top]
+    key = sort_key(answer)
+    scored = [(i, py_ratio(key, sort_key(c))) for i, c in enumerate(choices)]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
@@ -0,0 +1,81 @@
+"""
+Optional dependencies that are only imported when first used.
+
+``available(name)`` asks the import system whether a module could be imported
+without executing it, so ``_HAS_*`` flags stay cheap. ``lazy(name)`` returns a
+stand-in that imports the real module on first attribute access; a worker that
+never translates never pays for torch. ``import_times()`` records how long each
+deferred import took, for the startup profile.
+"""
+
+from __future__ import annotations
+import time
+import importlib
+import importlib.util
+import threading
+from typing import Dict
+
+_LOCK = threading.RLock()
+_IMPORT_TIMES: Dict[str, float] = {}
+
+
+def available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    # Only underscored attributes live on the stand-in, so nothing shadows the
+    # real module's API (torch.load, for one).
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _LOCK:
+                if self._module is None:
+                    t0 = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _IMPORT_TIMES[self._name] = time.perf_counter() - t0
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        if attr in ("_name", "_module"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+_MODULES: Dict[str, LazyModule] = {}
+
+
+def lazy(name: str) -> LazyModule:
+    with _LOCK:
+        return _MODULES.setdefault(name, LazyModule(name))
+
+
+def load(module: LazyModule):
+    """Import ``module`` now and return the real module."""
+    return module._load()
+
+
+def is_loaded(module: LazyModule) -> bool:
+    return module._module is not None
+
+
+def import_times() -> Dict[str, float]:
+    """Seconds spent importing each lazily loaded module, in load order."""
+    with _LOCK:
+        return dict(_IMPORT_TIMES)
+
+
+def loaded() -> Dict[str, bool]:
+    with _LOCK:
+        return {name: module._module is not None for name, module in _MODULES.items()}
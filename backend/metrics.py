@@ -0,0 +1,406 @@
+"""
+Prometheus metrics for the API: request latency and status per route, SQL
+statements and time per request, and timings of the slow external work
+(Marian, TTS, STT, SMTP).
+
+Every process keeps its own counters. When a metrics directory is configured
+(``METRICS_DIR``), each process also writes a snapshot of them to
+``<dir>/metrics-<pid>.json`` about once a second, and ``render()`` merges all
+snapshots, so a scrape of any gunicorn worker reports totals for the whole
+deployment. Counters and histograms of workers that have exited are kept so
+totals never go backwards; gauges only count live processes. Clear the
+directory before starting the server.
+
+Only the standard library is used; the output follows the Prometheus text
+exposition format (version 0.0.4).
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+_SEP = "\x1f"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: Dict[str, object] = {}
+
+    def _key(self, values: Sequence[str]) -> str:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {values}")
+        return _SEP.join(str(v) for v in values)
+
+    def _snapshot(self) -> Dict:
+        return {"type": self.kind, "help": self.help, "labels": list(self.labels), "series": dict(self._series)}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, value: float = 1.0):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._series[key] = self._series.get(key, 0.0) + value
+            self.registry.dirty = True
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, value: float = 1.0):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._series[key] = self._series.get(key, 0.0) + value
+            self.registry.dirty = True
+
+    def dec(self, *labels: str, value: float = 1.0):
+        self.inc(*labels, value=-value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        # Per-bucket (not cumulative) counts, then +Inf, sum and count.
+        slot = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[slot] += 1
+            series[-2] += value
+            series[-1] += 1
+            self.registry.dirty = True
+
+    def _snapshot(self) -> Dict:
+        snap = super()._snapshot()
+        snap["series"] = {k: list(v) for k, v in self._series.items()}
+        snap["buckets"] = list(self.buckets)
+        return snap
+
+
+class Registry:
+    def __init__(self, directory: Optional[str] = None, flush_seconds: float = 1.0):
+        self.directory = directory or None
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dirty = False
+        self._metrics: Dict[str, _Metric] = {}
+        self._flusher_pid = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(self, name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help, labels, buckets))
+
+    def _after_fork_in_child(self):
+        # The parent's numbers stay in the parent's snapshot; the child starts from zero.
+        # Fresh locks, since the fork may have happened while another thread held one.
+        self.lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._series.clear()
+        self.dirty = False
+        self._flusher_pid = 0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {name: metric._snapshot() for name, metric in self._metrics.items()}
+
+    # -- sharing between processes --
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self):
+        if not self.directory:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+        with self._flush_lock:
+            snap = self.snapshot()
+            path = self._path(os.getpid())
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(snap, f, separators=(",", ":"))
+            os.replace(tmp, path)
+
+    def start(self):
+        """Start this process's background flusher (once per process, including forked children)."""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(self.flush_seconds)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning(f"Metrics flush failed: {e}")
+
+        threading.Thread(target=loop, name="metrics-flush", daemon=True).start()
+
+    def _snapshots(self) -> Iterable[Tuple[bool, Dict]]:
+        if not self.directory:
+            yield True, self.snapshot()
+            return
+        self.dirty = True
+        self.flush()
+        for name in os.listdir(self.directory):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            try:
+                pid = int(name[len("metrics-"):-len(".json")])
+                with open(os.path.join(self.directory, name)) as f:
+                    snap = json.load(f)
+            except (ValueError, OSError):
+                continue
+            yield _alive(pid), snap
+
+    def collect(self) -> Dict[str, Dict]:
+        """All processes' snapshots merged into one."""
+        merged: Dict[str, Dict] = {}
+        for alive, snap in self._snapshots():
+            for name, metric in snap.items():
+                if metric["type"] == "gauge" and not alive:
+                    continue
+                into = merged.setdefault(name, {**metric, "series": {}})
+                for key, value in metric["series"].items():
+                    have = into["series"].get(key)
+                    if have is None:
+                        into["series"][key] = list(value) if isinstance(value, list) else value
+                    elif isinstance(value, list):
+                        into["series"][key] = [a + b for a, b in zip(have, value)]
+                    else:
+                        into["series"][key] = have + value
+        return merged
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labels = metric["labels"]
+            for key, value in sorted(metric["series"].items()):
+                pairs = list(zip(labels, key.split(_SEP))) if labels else []
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                running = 0
+                for bound, count in zip(metric["buckets"] + ["+Inf"], value):
+                    running += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {running}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(pairs)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+REGISTRY = Registry(os.environ.get("METRICS_DIR"), float(os.environ.get("METRICS_FLUSH_SECONDS", 1)))
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "portfolio_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "portfolio_http_request_duration_seconds", "Time from request start to the last body chunk.", ("method", "route"))
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "portfolio_http_requests_in_progress", "Requests being handled right now.")
+DB_QUERIES = REGISTRY.counter(
+    "portfolio_db_queries_total", "SQL statements executed, by database and route ('-' outside requests).",
+    ("db", "route"))
+DB_SECONDS = REGISTRY.counter(
+    "portfolio_db_query_seconds_total", "Time spent executing SQL statements.", ("db", "route"))
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "portfolio_db_queries_per_request", "SQL statements per request; a long tail points at N+1 loops.",
+    ("route",), buckets=QUERY_BUCKETS)
+OPERATION_SECONDS = REGISTRY.histogram(
+    "portfolio_operation_duration_seconds", "Marian load/inference, TTS, STT and SMTP timings.",
+    ("operation", "engine", "outcome"))
+
+# Per-request SQL accounting; a mutable holder so sync endpoints running in the
+# threadpool (which get a copy of the context) update the same object.
+_REQUEST: contextvars.ContextVar = contextvars.ContextVar("metrics_request", default=None)
+
+
+class _RequestStats:
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router writes the matched route into the scope before calling the endpoint.
+        return _route_of(self.scope) or "unmatched"
+
+
+@contextmanager
+def timed(operation: str, engine: str = ""):
+    """Record how long the block took in portfolio_operation_duration_seconds."""
+    REGISTRY.start()
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        OPERATION_SECONDS.observe(time.perf_counter() - t0, operation, engine, outcome)
+
+
+def track_queries(databases: Dict[str, str], warn_above: int = 0):
+    """Count SQL statements on every engine (sync and async) by database.
+
+    ``databases`` maps a label to a database URL; engines for other URLs are
+    labelled with their database name. Requests running more than
+    ``warn_above`` statements are logged once per route.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine, make_url
+
+    names = {make_url(url).database: label for label, url in databases.items()}
+    MetricsMiddleware.warn_above = warn_above
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_t0")
+        elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+        stats = _REQUEST.get()
+        route = stats.route if stats is not None else "-"
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        database = conn.engine.url.database
+        label = names.get(database) or os.path.basename(database or "") or conn.engine.url.get_backend_name()
+        DB_QUERIES.inc(label, route)
+        DB_SECONDS.inc(label, route, value=elapsed)
+
+    def on_error(context):
+        starts = context.connection.info.get("metrics_t0") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(Engine, "before_cursor_execute", before)
+    event.listen(Engine, "after_cursor_execute", after)
+    event.listen(Engine, "handle_error", on_error)
+
+
+def _route_of(scope) -> Optional[str]:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware overhead) recording per-route metrics.
+
+    The route is the matched template (``/practice/{iso}``), so label values
+    stay bounded; requests that match no route are recorded as "unmatched".
+    """
+
+    warn_above = 0
+    _warned: set = set()
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        REGISTRY.start()
+        stats = _RequestStats(scope)
+        token = _REQUEST.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            HTTP_IN_PROGRESS.dec()
+            _REQUEST.reset(token)
+            route = stats.route
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method, route, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route)
+            if self.warn_above and stats.queries > self.warn_above and route not in self._warned:
+                self._warned.add(route)
+                logger.warning(f"{method} {route} ran {stats.queries} SQL statements in one request "
+                               f"({stats.db_seconds * 1000:.0f} ms); possible N+1 query loop")
@@ -0,0 +1,217 @@
+"""
+Sampling profiler that can be switched on in a running server.
+
+A background thread snapshots every thread's Python stack with
+``sys._current_frames()`` at a fixed interval and counts identical stacks. The
+result is in folded-stack format (``frame;frame;frame count`` per line), which
+flamegraph.pl, speedscope and inferno render as a flame graph. Limiting a
+profile to one route keeps only samples whose stack is inside that route's
+endpoint function.
+
+With a shared directory, ``ProfilerControl.start`` writes the request to a
+control file that every worker polls, so one admin call profiles all gunicorn
+workers; each worker writes its own stacks and ``folded()`` merges them.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MAX_SECONDS = 300
+
+
+def _frame_label(code) -> str:
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, codes: Optional[Set] = None):
+        self.interval = interval
+        self.codes = codes or None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, own: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if self.codes is not None and not self.codes.intersection(codes):
+                continue
+            frames = [names.get(ident, "thread")] + [_frame_label(c) for c in reversed(codes)]
+            self.stacks[";".join(frames)] += 1
+        self.samples += 1
+
+    def _run(self, seconds: float, done: Optional[Callable[["SamplingProfiler"], None]]):
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample(own)
+            self._stop.wait(self.interval)
+        if done is not None:
+            done(self)
+
+    def start(self, seconds: float, done: Optional[Callable[["SamplingProfiler"], None]] = None):
+        self._thread = threading.Thread(target=self._run, args=(seconds, done), name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def merge_folded(texts: Iterable[str]) -> str:
+    total: Counter = Counter()
+    for text in texts:
+        for line in text.splitlines():
+            stack, _, count = line.rpartition(" ")
+            if stack and count.isdigit():
+                total[stack] += int(count)
+    return "".join(f"{stack} {count}\n" for stack, count in total.most_common())
+
+
+class ProfilerControl:
+    """Starts profiles, in this process or (with ``directory``) in every process polling it.
+
+    ``resolve(route)`` returns the code objects of the route's endpoint(s), or
+    raises ValueError for an unknown route.
+    """
+
+    def __init__(self, resolve: Callable[[str], Set], directory: Optional[str] = None, poll_seconds: float = 0.5):
+        self.resolve = resolve
+        self.directory = directory or None
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._current: Optional[Dict] = None
+        self._profiler: Optional[SamplingProfiler] = None
+        self._results: Dict[str, str] = {}
+        self._watch_pid = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def _control_path(self) -> str:
+        return os.path.join(self.directory, "profile.json")
+
+    def start(self, seconds: float, route: Optional[str] = None, interval_ms: float = 5) -> Dict:
+        seconds = min(max(seconds, 0.1), MAX_SECONDS)
+        if route:
+            self.resolve(route)  # reject unknown routes before anything starts
+        request = {"id": uuid.uuid4().hex[:12], "route": route or None, "interval_ms": max(1.0, interval_ms),
+                   "started_at": time.time(), "until": time.time() + seconds}
+        if self.directory:
+            tmp = f"{self._control_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(request, f)
+            os.replace(tmp, self._control_path)
+        self._begin(request)
+        return request
+
+    def _begin(self, request: Dict):
+        with self._lock:
+            if self._current is not None and self._current["id"] == request["id"]:
+                return
+            if self._profiler is not None:
+                self._profiler.stop()
+            remaining = request["until"] - time.time()
+            if remaining <= 0:
+                return
+            try:
+                codes = self.resolve(request["route"]) if request["route"] else None
+            except ValueError:
+                return
+            self._current = request
+            profiler = self._profiler = SamplingProfiler(request["interval_ms"] / 1000, codes)
+        profiler.start(remaining, done=lambda p, pid=request["id"]: self._finish(pid, p))
+
+    def _finish(self, profile_id: str, profiler: SamplingProfiler):
+        folded = profiler.folded()
+        with self._lock:
+            self._results = {profile_id: folded}
+        if self.directory:
+            suffix = f"-{os.getpid()}.folded"
+            path = os.path.join(self.directory, f"profile-{profile_id}{suffix}")
+            try:
+                # Only this process's latest profile is kept.
+                for name in os.listdir(self.directory):
+                    if name.startswith("profile-") and name.endswith(suffix):
+                        os.unlink(os.path.join(self.directory, name))
+                with open(path, "w") as f:
+                    f.write(folded)
+            except OSError as e:
+                logger.warning(f"Could not write profile {path}: {e}")
+
+    def watch(self):
+        """Poll the control file so profiles started in another worker also run here."""
+        if not self.directory or self._watch_pid == os.getpid():
+            return
+        self._watch_pid = os.getpid()
+
+        def loop():
+            seen = None
+            while True:
+                time.sleep(self.poll_seconds)
+                try:
+                    mtime = os.stat(self._control_path).st_mtime_ns
+                    if mtime == seen:
+                        continue
+                    seen = mtime
+                    with open(self._control_path) as f:
+                        self._begin(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        threading.Thread(target=loop, name="profiler-watch", daemon=True).start()
+
+    def status(self) -> Dict:
+        with self._lock:
+            current = dict(self._current) if self._current else None
+            running = self._profiler is not None and self._profiler.running
+            samples = self._profiler.samples if self._profiler is not None else 0
+        out = {"profile": current, "running": running, "samples": samples, "shared": bool(self.directory)}
+        if current and self.directory:
+            prefix = f"profile-{current['id']}-"
+            out["workers_done"] = sum(1 for n in os.listdir(self.directory) if n.startswith(prefix))
+        return out
+
+    def folded(self, profile_id: Optional[str] = None) -> Optional[str]:
+        """Folded stacks of a finished profile (the latest by default), merged across workers."""
+        with self._lock:
+            profile_id = profile_id or (self._current or {}).get("id")
+            local = self._results.get(profile_id)
+        if not profile_id:
+            return None
+        if not self.directory:
+            return local
+        prefix = f"profile-{profile_id}-"
+        texts = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".folded"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        texts.append(f.read())
+                except OSError:
+                    continue
+        return merge_folded(texts) if texts else None
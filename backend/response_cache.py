@@ -0,0 +1,134 @@
+"""
+Versioned response cache for read-mostly endpoints.
+
+Write paths bump a version counter; cached bodies are keyed on that version,
+so a bump makes every older entry unreachable without explicit invalidation.
+The counters live in a small memory-mapped file so every worker process sees
+the same versions, and an ETag derived from the version can be checked
+without rebuilding the response or touching the database.
+"""
+
+from __future__ import annotations
+import os
+import mmap
+import fcntl
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+_SLOT = struct.Struct("<Q")
+
+
+class VersionCounters:
+    """Fixed-size array of uint64 counters shared through a memory-mapped file.
+
+    Slot 0 holds the file's epoch (random, set when the file is created) so
+    ETags from before the file was recreated never match. Slot 1 is the
+    catalog version; course ids hash onto the remaining slots, where a
+    collision only causes an extra invalidation.
+    """
+
+    def __init__(self, path: str, slots: int = 4096):
+        self.path = path
+        self.slots = slots
+        size = slots * _SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _SLOT.pack(int.from_bytes(os.urandom(8), "little")), 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock_fd = os.open(path, os.O_RDWR)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def _after_fork_in_child(self):
+        # A forked worker shares the parent's open file description, and with it the
+        # flock; reopen so bumps from different workers exclude each other.
+        os.close(self._lock_fd)
+        self._lock_fd = os.open(self.path, os.O_RDWR)
+        self._lock = threading.Lock()
+
+    def _slot(self, course_id: Optional[int]) -> int:
+        if course_id is None:
+            return 1
+        return 2 + course_id % (self.slots - 2)
+
+    @property
+    def epoch(self) -> int:
+        return _SLOT.unpack_from(self._map, 0)[0]
+
+    def get(self, course_id: Optional[int] = None) -> int:
+        return _SLOT.unpack_from(self._map, self._slot(course_id) * _SLOT.size)[0]
+
+    def bump(self, course_id: Optional[int] = None) -> int:
+        offset = self._slot(course_id) * _SLOT.size
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                value = _SLOT.unpack_from(self._map, offset)[0] + 1
+                _SLOT.pack_into(self._map, offset, value)
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return value
+
+
+class ResponseCache:
+    """LRU cache of pre-serialised response bodies, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    @staticmethod
+    def etag(key: Hashable, epoch: int) -> str:
+        digest = hashlib.sha1(repr((epoch, key)).encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, etag: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (etag, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_kb": round(self._size / 1024, 1),
+                "max_kb": round(self.max_bytes / 1024, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,306 @@
+"""
+Serving the React production build.
+
+``deploy.sh`` copies the build into ``backend/static`` and then runs this module
+to write ``.br``/``.gz`` siblings next to every compressible file. At request
+time the best variant the client accepts is chosen, and the response is cached
+according to the kind of file:
+
+- hashed bundles (``static/js``, ``static/css``, ``static/media``) never change
+  under the same name, so they are ``immutable`` for a year and their metadata
+  is never re-checked
+- ``index.html`` and other unhashed files carry an ETag and must be revalidated
+  (``no-cache`` for the shell, a short max-age for the rest)
+
+Files up to ``hot_file_kb`` are kept in a byte-capped LRU and answered from
+memory. Larger files go out through the server's zero-copy path when the ASGI
+server offers one (``http.response.pathsend`` / ``http.response.zerocopysend``),
+and are otherwise streamed in large chunks.
+
+Usage:
+    python static_assets.py static/      # precompress a build in place
+"""
+
+from __future__ import annotations
+import os
+import gzip
+import mimetypes
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except Exception:
+    _HAS_BROTLI = False
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+IMMUTABLE_DIRS = ("static/js/", "static/css/", "static/media/")
+COMPRESSIBLE = (".js", ".css", ".html", ".json", ".map", ".svg", ".txt", ".xml", ".ico", ".webmanifest")
+# Preferred first.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+mimetypes.add_type("text/javascript", ".js")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+def accepted_encodings(header: Optional[str]) -> FrozenSet[str]:
+    """Encodings from an Accept-Encoding header that we have variants for (q > 0)."""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q <= 0:
+            continue
+        if name == "*":
+            accepted.update(enc for enc, _ in ENCODINGS)
+        elif name in ("br", "gzip"):
+            accepted.add(name)
+    return frozenset(accepted)
+
+
+class SendfileResponse(FileResponse):
+    """FileResponse that hands the file to the server when it can send it zero-copy."""
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope, receive, send) -> None:
+        extensions = scope.get("extensions") or {}
+        if self.send_header_only or not ({"http.response.pathsend", "http.response.zerocopysend"} & extensions.keys()):
+            await super().__call__(scope, receive, send)
+            return
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        else:
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno()})
+        if self.background is not None:
+            await self.background()
+
+
+class _Asset:
+    __slots__ = ("path", "size", "mtime_ns", "headers", "body")
+
+    def __init__(self, path: str, st: os.stat_result, headers: Dict[str, str]):
+        self.path = path
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.headers = headers
+        self.body: Optional[bytes] = None
+
+
+class StaticSite:
+    def __init__(self, root: str, index: str = "index.html", max_age: int = 3600,
+                 hot_file_kb: int = 256, hot_cache_mb: int = 32):
+        self.root = os.path.realpath(root)
+        self.index = index
+        self.max_age = max_age
+        self.hot_file_bytes = hot_file_kb * 1024
+        self.hot_cache_bytes = hot_cache_mb * 1024 * 1024
+        # (relative path, accepted encodings) -> _Asset; bodies are LRU-evicted separately.
+        self._assets: Dict[Tuple[str, FrozenSet[str]], _Asset] = {}
+        self._hot: "OrderedDict[Tuple[str, FrozenSet[str]], _Asset]" = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _resolve(self, rel: str) -> Optional[str]:
+        path = os.path.realpath(os.path.join(self.root, rel))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def _cache_control(self, rel: str) -> str:
+        if rel.startswith(IMMUTABLE_DIRS):
+            return IMMUTABLE
+        if rel == self.index:
+            return REVALIDATE
+        return f"public, max-age={self.max_age}"
+
+    def _build(self, rel: str, encodings: FrozenSet[str]) -> Optional[_Asset]:
+        path = self._resolve(rel)
+        if path is None:
+            return None
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        headers = {"cache-control": self._cache_control(rel), "content-type": media_type}
+        if media_type.startswith("text/") or media_type.endswith(("javascript", "json", "+xml")):
+            headers["content-type"] += "; charset=utf-8"
+        chosen, encoding = path, None
+        if path.endswith(COMPRESSIBLE):
+            headers["vary"] = "Accept-Encoding"
+            for enc, suffix in ENCODINGS:
+                if enc in encodings and os.path.isfile(path + suffix):
+                    chosen, encoding = path + suffix, enc
+                    break
+        st = os.stat(chosen)
+        if encoding:
+            headers["content-encoding"] = encoding
+        headers["etag"] = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+        return _Asset(chosen, st, headers)
+
+    def _lookup(self, rel: str, encodings: FrozenSet[str]) -> Optional[_Asset]:
+        key = (rel, encodings)
+        asset = self._assets.get(key)
+        if asset is not None and not rel.startswith(IMMUTABLE_DIRS):
+            # Unhashed files can be replaced by a redeploy; one stat tells us.
+            try:
+                st = os.stat(asset.path)
+            except OSError:
+                st = None
+            if st is None or (st.st_mtime_ns, st.st_size) != (asset.mtime_ns, asset.size):
+                self._drop(key)
+                asset = None
+        if asset is None:
+            asset = self._build(rel, encodings)
+            if asset is not None:
+                self._assets[key] = asset
+        return asset
+
+    def _drop(self, key) -> None:
+        with self._lock:
+            self._assets.pop(key, None)
+            old = self._hot.pop(key, None)
+            if old is not None and old.body is not None:
+                self._hot_bytes -= len(old.body)
+                old.body = None
+
+    def _body(self, key, asset: _Asset) -> Optional[bytes]:
+        if asset.size > self.hot_file_bytes:
+            return None
+        with self._lock:
+            if asset.body is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+                return asset.body
+        with open(asset.path, "rb") as f:
+            body = f.read()
+        with self._lock:
+            self.misses += 1
+            if asset.body is None and key in self._assets:
+                asset.body = body
+                self._hot[key] = asset
+                self._hot_bytes += len(body)
+                while self._hot_bytes > self.hot_cache_bytes and self._hot:
+                    _, evicted = self._hot.popitem(last=False)
+                    self._hot_bytes -= len(evicted.body)
+                    evicted.body = None
+        return body
+
+    @staticmethod
+    def _not_modified(asset: _Asset, if_none_match: Optional[str]) -> Optional[Response]:
+        if if_none_match and asset.headers["etag"] in [t.strip() for t in if_none_match.split(",")]:
+            headers = {k: v for k, v in asset.headers.items() if k not in ("content-type", "content-encoding")}
+            return Response(status_code=304, headers=headers)
+        return None
+
+    @staticmethod
+    def _from_memory(asset: _Asset, method: str, body: bytes) -> Response:
+        if method.upper() == "HEAD":
+            return Response(headers={**asset.headers, "content-length": str(asset.size)})
+        return Response(content=body, headers=asset.headers)
+
+    def response(self, rel: str, method: str = "GET", accept_encoding: Optional[str] = None,
+                 if_none_match: Optional[str] = None) -> Optional[Response]:
+        """Response for ``rel`` (a path relative to the root), or None if there is no such file."""
+        rel = rel.lstrip("/") or self.index
+        encodings = accepted_encodings(accept_encoding)
+        asset = self._lookup(rel, encodings)
+        if asset is None:
+            return None
+        not_modified = self._not_modified(asset, if_none_match)
+        if not_modified is not None:
+            return not_modified
+        body = self._body((rel, encodings), asset)
+        if body is not None:
+            return self._from_memory(asset, method, body)
+        return SendfileResponse(asset.path, headers=asset.headers, media_type=asset.headers["content-type"],
+                                stat_result=os.stat(asset.path), method=method)
+
+    def cached_response(self, rel: str, method: str = "GET", accept_encoding: Optional[str] = None,
+                        if_none_match: Optional[str] = None) -> Optional[Response]:
+        """Like response(), but only when no disk access is needed; None means call response().
+
+        Only hashed (immutable) files qualify; anything else is re-checked with a stat.
+        """
+        rel = rel.lstrip("/") or self.index
+        if not rel.startswith(IMMUTABLE_DIRS):
+            return None
+        key = (rel, accepted_encodings(accept_encoding))
+        asset = self._assets.get(key)
+        if asset is None:
+            return None
+        not_modified = self._not_modified(asset, if_none_match)
+        if not_modified is not None:
+            return not_modified
+        with self._lock:
+            body = asset.body
+            if body is None:
+                return None
+            if key in self._hot:
+                self._hot.move_to_end(key)
+            self.hits += 1
+        return self._from_memory(asset, method, body)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"root": self.root, "assets": len(self._assets), "hot_files": len(self._hot),
+                    "hot_bytes": self._hot_bytes, "hot_limit_bytes": self.hot_cache_bytes,
+                    "hits": self.hits, "misses": self.misses, "brotli": _HAS_BROTLI}
+
+
+def precompress(root: str, min_size: int = 1024) -> Dict[str, int]:
+    """Write .gz (and .br when brotli is installed) next to compressible files.
+
+    A variant is kept only if it is smaller than the original, and is rewritten
+    only when the original is newer.
+    """
+    counts = {"gzip": 0, "br": 0, "skipped": 0}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            if st.st_size < min_size:
+                counts["skipped"] += 1
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            encoders = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if _HAS_BROTLI:
+                encoders.append(("br", ".br", lambda d: brotli.compress(d, quality=11)))
+            for enc, suffix, compress in encoders:
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= st.st_mtime_ns:
+                    continue
+                packed = compress(data)
+                if len(packed) >= len(data):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                tmp = target + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(packed)
+                os.replace(tmp, target)
+                counts[enc] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+    for build_dir in sys.argv[1:] or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")]:
+        print(build_dir, precompress(build_dir))
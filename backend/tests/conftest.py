@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# app.py opens its databases at import, so point it at scratch files first.
+_scratch = tempfile.mkdtemp(prefix="portfolio-test-")
+os.environ.setdefault("TUTOR_DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'tutor.db')}")
+os.environ.setdefault("CONTACT_DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'contact.db')}")
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_scratch, "tts_cache"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
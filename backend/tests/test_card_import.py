@@ -0,0 +1,41 @@
+import asyncio
+
+import card_import
+
+
+def parse(fmt: str, text: str):
+    async def chunks():
+        data = text.encode()
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    async def collect():
+        return [r async for r in card_import.parse(fmt, chunks())]
+
+    return asyncio.run(collect())
+
+
+def test_stray_quote_is_a_literal():
+    rows = parse("csv", 'front,back\n5" screen,ecran\nA,B\nC,D\n')
+    assert [(n, c["front"]) for n, c, _ in rows] == [(2, '5" screen'), (3, "A"), (4, "C")]
+
+
+def test_quoted_field_spans_lines():
+    rows = parse("csv", 'front,back\n"multi\nline","say ""hi"""\nA,B\n')
+    assert rows[0] == (2, {"front": "multi\nline", "back": 'say "hi"', "hint": "", "tag": "imported"}, None)
+    assert rows[1][0] == 4
+
+
+def test_unterminated_quote_is_reported_and_later_rows_import():
+    body = "".join(f"r{i},s{i}\n" for i in range(3 * card_import.MAX_RECORD_LINES))
+    rows = parse("csv", 'front,back\n"never closed,x\n' + body)
+    assert rows[0][0] == 2 and rows[0][1] is None and "unterminated" in rows[0][2]
+    assert len(rows) == 1 + 3 * card_import.MAX_RECORD_LINES
+    assert all(card is not None for _, card, _ in rows[1:])
+
+
+def test_ndjson_non_string_fields():
+    rows = parse("ndjson", '{"front": 123, "back": "x"}\n{"front": ["a"], "back": "x"}\n{"front": "a", "back": "b"}\n')
+    assert rows[0][1]["front"] == "123"
+    assert rows[1] == (2, None, "front must be a string")
+    assert rows[2][1]["back"] == "b"
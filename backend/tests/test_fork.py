@@ -0,0 +1,55 @@
+"""Module-level locks must survive a fork from an already forked process.
+
+gunicorn --preload forks the workers from the master, and a worker forks
+again for the seed job's process pool.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+
+def _run_forked(target, timeout: float = 20.0) -> int:
+    """Run ``target`` in a forked child and return its exit code (-1 on timeout)."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = target()
+        finally:
+            os._exit(code)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        time.sleep(0.05)
+    os.kill(pid, 9)
+    os.waitpid(pid, 0)
+    return -1
+
+
+def test_registry_fork_in_fork():
+    registry = metrics.Registry()
+    counter = registry.counter("test_forks_total", "Forks.")
+    counter.inc()
+
+    def grandchild():
+        counter.inc()
+        return 0 if registry.snapshot()["test_forks_total"]["series"] else 1
+
+    assert _run_forked(lambda: _run_forked(grandchild)) == 0
+
+
+def test_app_worker_can_start_a_fork_pool():
+    import app  # noqa: F401  registers the app's fork hooks
+
+    def worker():
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            return 0 if pool.submit(abs, -3).result(timeout=10) == 3 else 1
+
+    assert _run_forked(worker) == 0
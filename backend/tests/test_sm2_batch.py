@@ -0,0 +1,48 @@
+"""sm2_update_batch must agree exactly with the scalar sm2_update."""
+
+import random
+
+import pytest
+
+import app
+
+
+def random_state(rng: random.Random):
+    return {
+        "repetition": rng.choice([0, 0, 1, 2, 3, rng.randint(4, 40)]),
+        "interval": rng.choice([1, 6, rng.randint(1, 4000)]),
+        "efactor": rng.choice([1.3, 2.5, round(rng.uniform(1.3, 3.0), 6), rng.uniform(1.3, 3.0)]),
+    }
+
+
+def scalar(states, qualities):
+    out = []
+    for st, q in zip(states, qualities):
+        card = app.Card(**st)
+        app.sm2_update(card, q)
+        out.append((card.repetition, card.interval, card.efactor, card.next_review))
+    return out
+
+
+def batch(states, qualities):
+    cols = app.sm2_update_batch([s["repetition"] for s in states], [s["interval"] for s in states],
+                                [s["efactor"] for s in states], qualities)
+    return list(zip(*cols))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_matches_scalar(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        states = [random_state(rng) for _ in range(50)]
+        # Several sessions in a row so drifted states (efactor at the 1.3 floor,
+        # long streaks) are covered too.
+        for _ in range(rng.randint(1, 5)):
+            qualities = [rng.randint(0, 5) for _ in states]
+            expected = scalar(states, qualities)
+            assert batch(states, qualities) == expected
+            states = [{"repetition": e[0], "interval": e[1], "efactor": e[2]} for e in expected]
+
+
+def test_batch_handles_empty_input():
+    assert list(zip(*app.sm2_update_batch([], [], [], []))) == []
@@ -0,0 +1,267 @@
+"""
+Local translation service shared by all web workers.
+
+One process owns the Marian models and listens on a Unix socket. Requests are
+newline-delimited JSON::
+
+    {"id": 1, "src": "en", "tgt": "fr", "texts": ["Hello", "Thank you"]}
+    -> {"id": 1, "translations": ["Bonjour", "Merci"]}
+
+    {"id": 2, "op": "stats"}
+    -> {"id": 2, "stats": {...}}
+
+A translation is ``null`` when the service has no model for the pair.
+
+Requests for the same language pair are gathered into micro-batches: a batch is
+run once it holds ``max_batch`` sentences or ``max_wait_ms`` after its oldest
+request arrived, whichever comes first. Each pair has at most one batch in
+flight; requests arriving meanwhile queue up and form the next batch, so
+batches grow with load. Duplicate sentences in a batch are translated once.
+
+``TranslationClient`` is the blocking client used by the web workers. It keeps
+one connection per thread (and per process, so forked children reconnect) and
+returns None whenever the service is unreachable, so the caller can fall back
+to in-process inference.
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import socket
+import signal
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+BatchTranslator = Callable[[List[str], str, str], Optional[List[str]]]
+_READ_LIMIT = 16 * 1024 * 1024
+
+
+class TranslationServer:
+    def __init__(self, translate_batch: BatchTranslator, max_batch: int = 32, max_wait_ms: float = 10,
+                 threads: int = 1):
+        self.translate_batch = translate_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="translate")
+        # (src, tgt) -> requests waiting for the next batch, with their arrival times
+        self._pending: Dict[Tuple[str, str], List[Tuple[List[str], asyncio.Future, float]]] = {}
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._wake: Dict[Tuple[str, str], asyncio.Event] = {}
+        self._batchers: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.requests = 0
+        self.batches = 0
+        self.sentences = 0
+        self.errors = 0
+        self.started_at = time.time()
+
+    async def submit(self, src: str, tgt: str, texts: List[str]) -> List[Optional[str]]:
+        loop = asyncio.get_running_loop()
+        key = (src, tgt)
+        fut = loop.create_future()
+        self.requests += 1
+        self._pending.setdefault(key, []).append((texts, fut, loop.time()))
+        self._sizes[key] = self._sizes.get(key, 0) + len(texts)
+        self._wake.setdefault(key, asyncio.Event()).set()
+        if key not in self._batchers:
+            self._batchers[key] = loop.create_task(self._batcher(key))
+        return await fut
+
+    async def _batcher(self, key: Tuple[str, str]):
+        # One loop per language pair, so a pair never has more than one batch in flight.
+        loop = asyncio.get_running_loop()
+        wake = self._wake[key]
+        while True:
+            await wake.wait()
+            wake.clear()
+            if not self._pending.get(key):
+                continue
+            # The window runs from the oldest waiting request; a backlog that built up
+            # during the previous batch has usually used it up already.
+            deadline = self._pending[key][0][2] + self.max_wait
+            while self._sizes[key] < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(wake.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                wake.clear()
+            await self._run(key, self._take(key))
+            if self._pending.get(key):
+                wake.set()
+
+    def _take(self, key: Tuple[str, str]) -> List[Tuple[List[str], asyncio.Future]]:
+        pending = self._pending[key]
+        items, size = [], 0
+        while pending and (not items or size + len(pending[0][0]) <= self.max_batch):
+            texts, fut, _ = pending.pop(0)
+            items.append((texts, fut))
+            size += len(texts)
+        self._sizes[key] -= size
+        return items
+
+    async def _run(self, key: Tuple[str, str], items: List[Tuple[List[str], asyncio.Future]]):
+        unique = list(dict.fromkeys(t for texts, _ in items for t in texts))
+        self.batches += 1
+        self.sentences += len(unique)
+        try:
+            loop = asyncio.get_running_loop()
+            outs = await loop.run_in_executor(self._executor, self.translate_batch, unique, key[0], key[1])
+        except Exception:
+            self.errors += 1
+            outs = None
+        done = dict(zip(unique, outs)) if outs else {}
+        for texts, fut in items:
+            if not fut.done():
+                fut.set_result([done.get(t) for t in texts])
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "mean_batch": round(self.sentences / self.batches, 2) if self.batches else 0.0,
+            "errors": self.errors,
+            "queued": sum(self._sizes.values()),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "uptime_s": round(time.time() - self.started_at, 1),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(msg: Dict):
+            reply: Dict = {"id": msg.get("id")}
+            try:
+                if msg.get("op") == "stats":
+                    reply["stats"] = self.stats()
+                else:
+                    texts = msg["texts"]
+                    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                        raise ValueError("texts must be a list of strings")
+                    reply["translations"] = await self.submit(str(msg["src"]), str(msg["tgt"]), texts)
+            except (KeyError, ValueError) as e:
+                reply["error"] = str(e)
+            async with write_lock:
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    msg = {"id": None, "op": "invalid"}
+                # Requests on one connection may be pipelined; each is answered when its batch is done.
+                task = asyncio.create_task(answer(msg))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+
+    async def serve(self, path: str):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._handle, path=path, limit=_READ_LIMIT)
+        os.chmod(path, 0o660)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+            self._executor.shutdown(wait=False)
+
+
+class TranslationClient:
+    def __init__(self, path: str, timeout: float = 30.0, retry_after: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+        self._ids = itertools.count(1)
+        self.calls = 0
+        self.failures = 0
+
+    def available(self) -> bool:
+        return bool(self.path) and time.monotonic() >= self._down_until and os.path.exists(self.path)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and conn[0] == os.getpid():
+            return conn
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        conn = (os.getpid(), sock, sock.makefile("rb"))
+        self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None and conn[0] == os.getpid():
+            _, sock, rfile = conn
+            for part in (rfile, sock):
+                try:
+                    part.close()
+                except OSError:
+                    pass
+
+    def request(self, msg: Dict) -> Optional[Dict]:
+        if not self.available():
+            return None
+        msg = {"id": next(self._ids), **msg}
+        try:
+            _, sock, rfile = self._connection()
+            sock.sendall(json.dumps(msg).encode() + b"\n")
+            line = rfile.readline(_READ_LIMIT)
+            if not line:
+                raise ConnectionError("translation service closed the connection")
+            reply = json.loads(line)
+        except (OSError, ValueError):
+            self._close()
+            self.failures += 1
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+        self.calls += 1
+        return reply
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> Optional[List[Optional[str]]]:
+        """Translations from the service, or None if it could not be reached."""
+        reply = self.request({"src": src, "tgt": tgt, "texts": texts})
+        if reply is None or "translations" not in reply:
+            return None
+        return reply["translations"]
+
+    def stats(self) -> Dict:
+        reply = self.request({"op": "stats"})
+        return {
+            "socket": self.path,
+            "available": reply is not None,
+            "calls": self.calls,
+            "failures": self.failures,
+            "server": reply.get("stats") if reply else None,
+        }
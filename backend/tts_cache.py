@@ -0,0 +1,162 @@
+"""
+Content-addressed on-disk cache for synthesised speech.
+
+Audio is keyed on (engine, lang, text), stored as ``<root>/<ab>/<sha256>.mp3``
+and evicted least-recently-used once the directory exceeds its size cap.
+"""
+
+from __future__ import annotations
+import os
+import hashlib
+import tempfile
+import threading
+import time
+from typing import Optional, Dict, Tuple
+
+
+class TTSEngine:
+    """Interface for speech synthesisers used by the tutor."""
+
+    name = "base"
+    media_type = "audio/mpeg"
+
+    def synthesize(self, text: str, lang: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class StubTTSEngine(TTSEngine):
+    """Deterministic offline engine for tests and load tests."""
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def synthesize(self, text: str, lang: str) -> Optional[bytes]:
+        if self.delay:
+            time.sleep(self.delay)  # stand-in for synthesis time in load tests
+        # An MPEG frame header followed by a payload derived from the input.
+        payload = f"{lang}:{text}".encode("utf-8")
+        return b"\xff\xfb\x90\x00" + payload * 16
+
+
+class AudioCache:
+    def __init__(self, root: str, max_bytes: int, low_water: float = 0.9):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Eviction frees down to this, so the directory rescan is not repeated on every store.
+        self.low_water_bytes = int(max_bytes * low_water)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def key(engine: str, text: str, lang: str) -> str:
+        return hashlib.sha256(f"{engine}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def _scan(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                if not fn.endswith(".mp3"):
+                    continue
+                full = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                yield full, st.st_size, st.st_mtime
+
+    def lookup(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def store(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str):
+        entries = sorted(self._scan(), key=lambda e: e[2])
+        # Rescan so files written by other workers are counted too.
+        self._size = sum(size for _, size, _ in entries)
+        if self._size <= self.max_bytes:
+            return
+        for full, size, _ in entries:
+            if self._size <= self.low_water_bytes:
+                break
+            if full == keep:
+                continue
+            try:
+                os.unlink(full)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    def get_or_create(self, engine: TTSEngine, text: str, lang: str) -> Tuple[Optional[str], str]:
+        """Return (path, key) for the audio, synthesising it on a miss."""
+        key = self.key(engine.name, text, lang)
+        path = self.lookup(key)
+        if path:
+            return path, key
+        data = engine.synthesize(text, lang)
+        if not data:
+            return None, key
+        return self.store(key, data), key
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size_mb": round(self._size / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+        }
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None when the header is absent or malformed (serve the full body)
+    and raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    start_s, end_s = spec.split("-", 1)
+    if not (start_s or end_s) or not (start_s + end_s).isdigit():
+        return None
+    if start_s == "":
+        length = int(end_s)
+        start, end = max(0, size - length), size - 1
+        if length == 0:
+            raise ValueError(f"unsatisfiable range {header!r}")
+    else:
+        start = int(start_s)
+        end = min(int(end_s) if end_s else size - 1, size - 1)
+    if start > end or start >= size:
+        raise ValueError(f"unsatisfiable range {header!r}")
+    return start, end
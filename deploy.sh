@@ -17,7 +17,19 @@ cd ..
 rm -rf backend/static
 mkdir -p backend/static
 cp -r frontend/build/* backend/static/
+# Precompressed .br/.gz variants are served to clients that accept them
+python backend/static_assets.py backend/static
 
 # Step 4: Run backend server with Gunicorn
+# --preload imports the app once in the master; set MARIAN_PRELOAD=1 (with
+# MARIAN_WARMUP=en-fr,...) to load translation models there too, shared by all workers
 cd backend
-gunicorn -w 4 -b 0.0.0.0:8000 app:app
+# Per-process metric snapshots merged by /metrics; stale ones from the last run are cleared
+export METRICS_DIR="${METRICS_DIR:-/tmp/portfolio-metrics}"
+rm -rf "$METRICS_DIR"
+# Admission limits (concurrency, queues, per-client rates) shared by all workers
+export ADMISSION_STORE="${ADMISSION_STORE:-shared}"
+# Shared translation service that owns the Marian models and batches requests
+# from all workers; without it each worker translates in-process
+python app.py translation-server &
+gunicorn --preload -w 4 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 app:app